@@ -0,0 +1,149 @@
+"""
+Compares the sync gunicorn deployment with the async ASGI mode (src/asgi.py)
+on the same seeded SQLite database, with many concurrent clients.
+
+    $ python benchmarks/bench_async.py --concurrency 200 --sync-workers 4
+
+Needs gunicorn, uvicorn, asgiref and aiosqlite installed. Fails (exit code 1)
+when a server answers any request with a 4xx/5xx.
+"""
+import os
+import sys
+import json
+import time
+import random
+import secrets
+import socket
+import argparse
+import tempfile
+import subprocess
+import urllib.request
+import urllib.error
+from concurrent.futures import ThreadPoolExecutor
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--people", type=int, default=20000)
+parser.add_argument("--users", type=int, default=1000)
+parser.add_argument("--requests", type=int, default=2000)
+parser.add_argument("--concurrency", type=int, default=100)
+parser.add_argument("--sync-workers", type=int, default=2)
+args = parser.parse_args()
+
+db_file = os.path.join(tempfile.mkdtemp(), "bench_async.db")
+os.environ["DATABASE_URL"] = "sqlite:///" + db_file
+# Los servidores tienen que aceptar los tokens firmados aqui
+os.environ.setdefault("JWT_SECRET_KEY", secrets.token_urlsafe(32))
+sys.path.insert(0, SRC)
+
+from sqlalchemy import insert
+from app import app
+from models import db, User, People, Favorites_people
+from flask_jwt_extended import create_access_token
+
+rng = random.Random(7)
+
+with app.app_context():
+    db.create_all()
+    db.session.execute(insert(People), [
+        {"name": f"person {i}", "height": 170, "mass": 70, "birth_year": 19, "homeworld": "Tatooine"}
+        for i in range(args.people)
+    ])
+    db.session.execute(insert(User), [
+        {"name": f"user {i}", "last_name": "bench", "email": f"user{i}@example.com", "password": "secret"}
+        for i in range(args.users)
+    ])
+    db.session.execute(insert(Favorites_people), [
+        {"user_id": user_id, "people_id": people_id}
+        for user_id in range(1, args.users + 1)
+        for people_id in rng.sample(range(1, args.people + 1), 5)
+    ])
+    db.session.commit()
+    tokens = {
+        user_id: {"Authorization": "Bearer " + create_access_token(identity=str(user_id))}
+        for user_id in range(1, args.users + 1)
+    }
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start(command, port):
+    process = subprocess.Popen(command, env=os.environ.copy(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"{command[0]} did not start")
+
+
+def get(request):
+    url, headers = request
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, headers=headers)) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as error:
+        status = error.code
+    return time.perf_counter() - start, status
+
+
+def any_request(port):
+    user_id = rng.randint(1, args.users)
+    path, headers = rng.choice([
+        (f"/people/{rng.randint(1, args.people)}", {}),
+        (f"/user/{user_id}/favorites", tokens[user_id]),
+        ("/people?limit=50", {}),
+    ])
+    return f"http://127.0.0.1:{port}" + path, headers
+
+
+def drive(port):
+    requests = [any_request(port) for _ in range(args.requests)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        results = list(pool.map(get, requests))
+    wall = time.perf_counter() - start
+    latencies = sorted(latency for latency, _ in results)
+    statuses = {}
+    for _, status in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return {
+        "throughput_rps": round(len(requests) / wall, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 2),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95)] * 1000, 2),
+        "statuses": statuses,
+    }
+
+
+report = {"requests": args.requests, "concurrency": args.concurrency}
+for name, command in (
+    (f"sync_gunicorn_{args.sync_workers}_workers", ["gunicorn", "wsgi", "--chdir", SRC, "-w", str(args.sync_workers)]),
+    ("async_uvicorn_1_process", ["uvicorn", "asgi:application", "--app-dir", SRC, "--log-level", "warning"]),
+):
+    port = free_port()
+    bind = ["-b", f"127.0.0.1:{port}"] if command[0] == "gunicorn" else ["--port", str(port)]
+    process = start(command + bind, port)
+    try:
+        report[name] = drive(port)
+    finally:
+        process.terminate()
+        process.wait()
+
+print(json.dumps(report, indent=2))
+os.remove(db_file)
+failed = [
+    name for name, result in report.items()
+    if isinstance(result, dict) and any(int(status) >= 400 for status in result["statuses"])
+]
+if failed:
+    sys.exit(f"4xx/5xx responses from: {', '.join(failed)}")
@@ -0,0 +1,90 @@
+"""
+Measures what authentication costs per request: verifying the JWT, resolving
+the user with and without the identity cache (AUTH_USER_CACHE_SIZE=0 turns it
+off) and checking a password on login.
+
+    $ python benchmarks/bench_auth.py --requests 5000
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--requests", type=int, default=2000)
+parser.add_argument("--logins", type=int, default=20)
+parser.add_argument("--child", action="store_true")
+args = parser.parse_args()
+
+
+def per_call_us(call, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        call()
+    return (time.perf_counter() - start) / count * 1e6
+
+
+if args.child:
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+    from sqlalchemy import event
+    from flask_jwt_extended import create_access_token, decode_token
+    from app import app
+    from models import db, User
+
+    with app.app_context():
+        db.create_all()
+        user = User(name="bench", last_name="auth", email="bench@example.com")
+        user.set_password("secret")
+        db.session.add(user)
+        db.session.commit()
+        token = create_access_token(identity=str(user.id))
+        path = f"/user/{user.id}/favorites"
+        decode_us = per_call_us(lambda: decode_token(token), args.requests)
+
+        statements = [0]
+        event.listen(db.engine, "before_cursor_execute", lambda *_: statements.__setitem__(0, statements[0] + 1))
+
+    client = app.test_client()
+    headers = {"Authorization": f"Bearer {token}"}
+    for _ in range(200):
+        client.get(path, headers=headers)
+    statements[0] = 0
+    request_us = per_call_us(lambda: client.get(path, headers=headers), args.requests)
+    login_us = per_call_us(
+        lambda: client.post("/login", json={"email": "bench@example.com", "password": "secret"}), args.logins
+    )
+    print(json.dumps({
+        "decode_us": decode_us,
+        "request_us": request_us,
+        "statements_per_request": statements[0] / args.requests,
+        "login_us": login_us,
+    }))
+    sys.exit(0)
+
+
+def run(cache_size):
+    env = dict(
+        os.environ, AUTH_USER_CACHE_SIZE=str(cache_size), SQL_INSTRUMENTATION="false",
+        DATABASE_URL="sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+    )
+    output = subprocess.check_output(
+        [sys.executable, __file__, "--child", "--requests", str(args.requests), "--logins", str(args.logins)],
+        env=env, stderr=subprocess.DEVNULL
+    )
+    return json.loads(output)
+
+
+cached = run(1024)
+uncached = run(0)
+print(json.dumps({
+    "requests": args.requests,
+    "jwt_verify_us": round(cached["decode_us"], 2),
+    "us_per_request_with_user_cache": round(cached["request_us"], 2),
+    "us_per_request_without_user_cache": round(uncached["request_us"], 2),
+    "statements_per_request_with_user_cache": round(cached["statements_per_request"], 2),
+    "statements_per_request_without_user_cache": round(uncached["statements_per_request"], 2),
+    "login_ms": round(cached["login_us"] / 1000, 2),
+}, indent=2))
@@ -0,0 +1,97 @@
+"""
+CPU cost versus bytes saved by response compression, per endpoint.
+
+Seeds a throwaway SQLite database, fetches each endpoint's plain body once and
+times gzip and brotli (if installed) on it at the configured levels. It also
+times the full request with Accept-Encoding on the first hit, which compresses,
+and on repeat hits, which reuse the bytes cached by ETag.
+
+    $ python benchmarks/bench_compression.py --people 5000 --planets 500
+    $ COMPRESS_GZIP_LEVEL=9 COMPRESS_BROTLI_LEVEL=6 python benchmarks/bench_compression.py
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--people", type=int, default=2000)
+parser.add_argument("--planets", type=int, default=200)
+parser.add_argument("--users", type=int, default=200)
+parser.add_argument("--repeat", type=int, default=50)
+args = parser.parse_args()
+
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ.setdefault("COMPRESS_MIN_SIZE", "0")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from sqlalchemy import insert
+from app import app
+from models import db, User, People, Planets
+from compression import compress, encodings, compressed_bodies
+
+ENDPOINTS = {
+    "people page": "/people?limit=100",
+    "people all": "/people",
+    "planets all": "/planets",
+    "users all": "/users",
+    "one person": "/people/1",
+    "search": "/search?q=person 1",
+}
+
+
+def seed():
+    with app.app_context():
+        db.create_all()
+        db.session.execute(insert(People), [
+            {"name": f"person {i}", "height": 100 + i % 100, "mass": 50 + i % 80, "birth_year": i % 900,
+             "homeworld": f"planet {i % max(args.planets, 1)}"}
+            for i in range(args.people)
+        ])
+        db.session.execute(insert(Planets), [
+            {"name": f"planet {i}", "climate": "arid", "diameter": 1000 + i, "orbital_period": 300, "population": i * 1000}
+            for i in range(args.planets)
+        ])
+        db.session.execute(insert(User), [
+            {"name": f"user {i}", "last_name": "bench", "email": f"user{i}@example.com", "password": "x"}
+            for i in range(args.users)
+        ])
+        db.session.commit()
+
+
+def per_call_us(call, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        call()
+    return (time.perf_counter() - start) / count * 1e6
+
+
+def main():
+    seed()
+    client = app.test_client()
+    report = {}
+    for name, path in ENDPOINTS.items():
+        plain = client.get(path).get_data()
+        row = {"bytes": len(plain)}
+        for encoding in encodings():
+            body = compress(plain, encoding)
+            compressed_bodies.clear()
+            headers = {"Accept-Encoding": encoding}
+            first_hit_us = per_call_us(lambda: (compressed_bodies.clear(), client.get(path, headers=headers)), args.repeat)
+            client.get(path, headers=headers)
+            row[encoding] = {
+                "bytes": len(body),
+                "saved_pct": round(100 * (1 - len(body) / max(len(plain), 1)), 1),
+                "compress_us": round(per_call_us(lambda: compress(plain, encoding), args.repeat), 1),
+                "request_us_first_hit": round(first_hit_us, 1),
+                "request_us_cached": round(per_call_us(lambda: client.get(path, headers=headers), args.repeat), 1),
+            }
+        row["request_us_uncompressed"] = round(per_call_us(lambda: client.get(path), args.repeat), 1)
+        report[name] = row
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
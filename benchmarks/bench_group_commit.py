@@ -0,0 +1,111 @@
+"""
+Favorite writes per second with and without group commit (FAVORITES_GROUP_COMMIT).
+
+Each mode runs in its own process on a fresh database: --threads clients add
+--writes favorites each, then delete them, through the Flask app. Errors are
+counted, not hidden, so a mode that trades correctness for speed shows up.
+
+    $ python benchmarks/bench_group_commit.py --threads 32 --writes 100
+    $ python benchmarks/bench_group_commit.py --database-url postgresql://localhost/bench_throwaway
+
+--database-url must point at a throwaway database: its tables are dropped and
+recreated. Without it a temporary SQLite file is used.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--threads", type=int, default=16)
+parser.add_argument("--writes", type=int, default=100, help="favorites added (and deleted) per thread")
+parser.add_argument("--window-ms", type=float, default=2)
+parser.add_argument("--database-url")
+parser.add_argument("--child", action="store_true")
+args = parser.parse_args()
+
+
+def timed(call, jobs):
+    errors = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.threads) as pool:
+        for ok in pool.map(call, jobs):
+            errors += not ok
+    elapsed = time.perf_counter() - start
+    return {"writes_per_s": round(len(jobs) / elapsed, 1), "errors": errors}
+
+
+if args.child:
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+    from sqlalchemy import insert
+    from flask_jwt_extended import create_access_token
+    from app import app
+    from models import db, User, People, Favorites_people
+    import group_commit
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.execute(insert(People), [{"name": f"person {i}"} for i in range(args.writes)])
+        db.session.execute(insert(User), [
+            {"name": f"user {i}", "last_name": "bench", "email": f"user{i}@example.com", "password": "x"}
+            for i in range(args.threads)
+        ])
+        db.session.commit()
+        user_ids = db.session.execute(db.select(User.id)).scalars().all()
+        people_ids = db.session.execute(db.select(People.id)).scalars().all()
+        headers = {id: {"Authorization": "Bearer " + create_access_token(identity=str(id))} for id in user_ids}
+
+    # Cada hilo escribe con su usuario, intercalados para que las escrituras coincidan en el tiempo
+    adds = [(user, person) for person in people_ids for user in user_ids]
+
+    def add(job):
+        user, person = job
+        response = app.test_client().post(f"/favorite/people/{person}", headers=headers[user])
+        return response.status_code == 201
+
+    report = {"add": timed(add, adds)}
+    with app.app_context():
+        deletes = db.session.execute(db.select(Favorites_people.user_id, Favorites_people.id)).all()
+
+    def delete(job):
+        user, id = job
+        response = app.test_client().delete(f"/favorites/people/{id}", headers=headers[user])
+        return response.status_code == 200
+
+    report["delete"] = timed(delete, deletes)
+    if group_commit.group_committer is not None:
+        report["group_commit"] = group_commit.group_committer.serialize()
+    print(json.dumps(report))
+    sys.exit(0)
+
+
+def run(enabled):
+    url = args.database_url or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+    env = dict(
+        os.environ, DATABASE_URL=url, SQL_INSTRUMENTATION="false", ADMIN_MODE="disabled",
+        FAVORITES_GROUP_COMMIT="true" if enabled else "false", GROUP_COMMIT_WINDOW_MS=str(args.window_ms),
+        GROUP_COMMIT_MAX_QUEUE=str(max(args.threads * 2, 100))
+    )
+    output = subprocess.check_output(
+        [sys.executable, __file__, "--child", "--threads", str(args.threads), "--writes", str(args.writes)],
+        env=env, stderr=subprocess.DEVNULL
+    )
+    return json.loads(output)
+
+
+single = run(False)
+grouped = run(True)
+print(json.dumps({
+    "database": (args.database_url or "sqlite").split(":")[0],
+    "threads": args.threads,
+    "writes": args.threads * args.writes,
+    "one_commit_per_write": single,
+    "group_commit": grouped,
+    "add_speedup": round(grouped["add"]["writes_per_s"] / single["add"]["writes_per_s"], 2),
+    "delete_speedup": round(grouped["delete"]["writes_per_s"] / single["delete"]["writes_per_s"], 2),
+}, indent=2))
@@ -0,0 +1,50 @@
+"""
+Measures the per-request overhead of the Prometheus hooks by timing the same
+requests through the Flask test client with METRICS_ENABLED on and off.
+
+    $ python benchmarks/bench_metrics_overhead.py --requests 20000
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--requests", type=int, default=10000)
+parser.add_argument("--path", default="/internal/cache")
+parser.add_argument("--child", action="store_true")
+args = parser.parse_args()
+
+if args.child:
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+    from app import app
+    client = app.test_client()
+    for _ in range(200):
+        client.get(args.path)
+    start = time.perf_counter()
+    for _ in range(args.requests):
+        client.get(args.path)
+    print((time.perf_counter() - start) / args.requests * 1e6)
+    sys.exit(0)
+
+
+def run(enabled):
+    env = dict(os.environ, METRICS_ENABLED=enabled, DATABASE_URL="sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db"))
+    output = subprocess.check_output(
+        [sys.executable, __file__, "--child", "--requests", str(args.requests), "--path", args.path], env=env
+    )
+    return float(output.strip())
+
+
+without_metrics = run("false")
+with_metrics = run("true")
+print(json.dumps({
+    "path": args.path,
+    "requests": args.requests,
+    "us_per_request_without_metrics": round(without_metrics, 2),
+    "us_per_request_with_metrics": round(with_metrics, 2),
+    "overhead_us": round(with_metrics - without_metrics, 2),
+}, indent=2))
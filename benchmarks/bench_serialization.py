@@ -0,0 +1,78 @@
+"""
+Compares the ORM + serialize() read path against the column projection path
+used by the list endpoints, reporting per-row CPU time and peak memory.
+
+    $ python benchmarks/bench_serialization.py --rows 100000
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--rows", type=int, default=50000)
+parser.add_argument("--repeat", type=int, default=3)
+args = parser.parse_args()
+
+db_file = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ["DATABASE_URL"] = "sqlite:///" + db_file
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from sqlalchemy import insert
+from app import app
+from models import db, People
+from utils import orjson
+
+
+def orm_path():
+    data = db.session.scalars(db.select(People)).all()
+    body = json.dumps({"results": [item.serialize() for item in data]})
+    db.session.expunge_all()
+    return body
+
+
+def projection_path():
+    columns = [getattr(People, field) for field in People.public_fields]
+    data = db.session.execute(db.select(*columns)).mappings().all()
+    return app.json.dumps({"results": [dict(row) for row in data]})
+
+
+def sparse_path():
+    data = db.session.execute(db.select(People.id, People.name, People.homeworld)).mappings().all()
+    return app.json.dumps({"results": [dict(row) for row in data]})
+
+
+def measure(fn):
+    best = float("inf")
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"us_per_row": round(best / args.rows * 1e6, 3), "peak_kb": round(peak / 1024)}
+
+
+with app.app_context():
+    db.create_all()
+    db.session.execute(insert(People), [
+        {"name": f"person {i}", "height": 170, "mass": 70, "birth_year": 19, "homeworld": "Tatooine"}
+        for i in range(args.rows)
+    ])
+    db.session.commit()
+
+    report = {
+        "rows": args.rows,
+        "encoder": "orjson" if orjson else "stdlib",
+        "orm_serialize": measure(orm_path),
+        "projection": measure(projection_path),
+        "projection_sparse_3_fields": measure(sparse_path),
+    }
+    print(json.dumps(report, indent=2))
+
+os.remove(db_file)
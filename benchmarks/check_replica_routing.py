@@ -0,0 +1,96 @@
+"""
+Read-replica routing checked with two SQLite files.
+
+The primary is seeded and copied to a second file that acts as the replica. Then
+person 1 is renamed in each file, so every response shows which database served
+it. The script checks that:
+
+- GETs and admin list views read the replica;
+- a client that just wrote reads the primary until DB_REPLICA_STICKY_SECONDS pass,
+  while other clients keep reading the replica;
+- a replica that cannot be opened is skipped and reads fall back to the primary
+  once the background health check notices.
+
+Exits with 1 on the first failed check.
+
+    $ python benchmarks/check_replica_routing.py
+"""
+import os
+import sys
+import time
+import shutil
+import sqlite3
+import tempfile
+
+directory = tempfile.mkdtemp()
+primary_path = os.path.join(directory, "primary.db")
+replica_path = os.path.join(directory, "replica.db")
+os.environ["DATABASE_URL"] = "sqlite:///" + primary_path
+os.environ["DATABASE_REPLICA_URLS"] = "sqlite:///" + replica_path
+os.environ["DB_REPLICA_STICKY_SECONDS"] = "1"
+os.environ["DB_REPLICA_HEALTH_INTERVAL"] = "0.1"
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from sqlalchemy import insert
+from app import app
+from models import db, People
+
+failures = []
+
+
+def check(name, ok):
+    print(("ok    " if ok else "FAIL  ") + name)
+    if not ok:
+        failures.append(name)
+
+
+def person_name(client):
+    return client.get("/people?ids=1").get_json()["results"][0]["name"]
+
+
+def seed():
+    with app.app_context():
+        db.create_all()
+        db.session.execute(insert(People), [{"name": f"person {i}"} for i in range(3)])
+        db.session.commit()
+    shutil.copy(primary_path, replica_path)
+    # Simula el retraso de replicacion: cada fichero tiene un nombre distinto
+    with sqlite3.connect(replica_path) as replica:
+        replica.execute("UPDATE people SET name = 'on replica' WHERE id = 1")
+
+
+def main():
+    seed()
+    writer, reader = app.test_client(), app.test_client()
+    # El primer GET arranca el chequeo en segundo plano; hasta que pasa se lee del primario
+    person_name(reader)
+    time.sleep(0.3)
+
+    check("GET reads the replica", person_name(reader) == "on replica")
+    check("admin list view reads the replica", b"on replica" in reader.get("/admin/people/").data)
+
+    response = writer.put("/people/1", json={"name": "on primary"})
+    check("write goes to the primary", response.status_code == 200)
+    check("writer reads its own write", person_name(writer) == "on primary")
+    check("other clients keep reading the replica", person_name(reader) == "on replica")
+    time.sleep(1.1)
+    check("writer returns to the replica after the sticky window", person_name(writer) == "on replica")
+
+    # Replica caida: el fichero deja de poder abrirse
+    os.replace(replica_path, replica_path + ".down")
+    os.mkdir(replica_path)
+    with app.app_context():
+        db.engines["replica_0"].dispose()
+    time.sleep(0.3)
+    check("unhealthy replica falls back to the primary", person_name(reader) == "on primary")
+
+    os.rmdir(replica_path)
+    os.replace(replica_path + ".down", replica_path)
+    time.sleep(0.3)
+    check("recovered replica is used again", person_name(reader) == "on replica")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+"""
+Load test for every route in src/app.py.
+
+Seeds a throwaway SQLite database, drives each endpoint through the Flask test
+client (or a real gunicorn process with --gunicorn) and prints throughput and
+p50/p95/p99 latency per endpoint as JSON.
+
+    $ python benchmarks/load_test.py --people 1000000 --planets 100000 --users 100000
+    $ python benchmarks/load_test.py --gunicorn --workers 4 --concurrency 32 --output run.json
+    $ python benchmarks/load_test.py --baseline run.json --threshold 0.2
+
+With --baseline the run fails (exit code 1) when an endpoint's p95 grows or its
+throughput drops by more than --threshold compared with the baseline file. Any
+run fails when an endpoint answers a status its scenario does not expect (a 422
+from a token the server cannot verify would otherwise pass as a fast request).
+"""
+import os
+import sys
+import json
+import time
+import random
+import secrets
+import socket
+import argparse
+import tempfile
+import subprocess
+import urllib.request
+import urllib.error
+from concurrent.futures import ThreadPoolExecutor
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--people", type=int, default=10000)
+parser.add_argument("--planets", type=int, default=1000)
+parser.add_argument("--users", type=int, default=1000)
+parser.add_argument("--favorites-per-user", type=int, default=5)
+parser.add_argument("--requests", type=int, default=200, help="requests per endpoint")
+parser.add_argument("--gunicorn", action="store_true", help="serve with gunicorn instead of the test client")
+parser.add_argument("--workers", type=int, default=2)
+parser.add_argument("--concurrency", type=int, default=8)
+parser.add_argument("--seed", type=int, default=42)
+parser.add_argument("--output")
+parser.add_argument("--baseline")
+parser.add_argument("--threshold", type=float, default=0.2)
+args = parser.parse_args()
+
+db_file = os.path.join(tempfile.mkdtemp(), "load_test.db")
+os.environ["DATABASE_URL"] = "sqlite:///" + db_file
+# La misma clave para los tokens de este proceso y para los workers de gunicorn
+os.environ.setdefault("JWT_SECRET_KEY", secrets.token_urlsafe(32))
+sys.path.insert(0, SRC)
+
+from sqlalchemy import insert
+from app import app
+from models import db, User, People, Planets, Favorites_people, Favorites_planets
+from search import install_sqlite_search
+from flask_jwt_extended import create_access_token
+from werkzeug.security import generate_password_hash
+
+rng = random.Random(args.seed)
+CHUNK = 10000
+
+
+def seed():
+    def chunks(total, build):
+        for start in range(0, total, CHUNK):
+            yield [build(i) for i in range(start, min(start + CHUNK, total))]
+
+    # Un solo hash para todos: scrypt por fila haria el seed de millones de usuarios eterno
+    password = generate_password_hash("secret")
+    with app.app_context():
+        db.create_all()
+        for rows in chunks(args.people, lambda i: {
+            "name": f"person {i}", "height": rng.randint(60, 230), "mass": rng.randint(20, 200),
+            "birth_year": rng.randint(1, 900), "homeworld": f"planet {rng.randrange(max(args.planets, 1))}"
+        }):
+            db.session.execute(insert(People), rows)
+        for rows in chunks(args.planets, lambda i: {
+            "name": f"planet {i}", "climate": rng.choice(["arid", "temperate", "frozen", "murky"]),
+            "diameter": rng.randint(1000, 20000), "orbital_period": rng.randint(100, 600),
+            "population": rng.randint(0, 10 ** 9)
+        }):
+            db.session.execute(insert(Planets), rows)
+        for rows in chunks(args.users, lambda i: {
+            "name": f"user {i}", "last_name": "load", "email": f"user{i}@example.com", "password": password
+        }):
+            db.session.execute(insert(User), rows)
+        for user_start in range(1, args.users + 1, CHUNK):
+            users = range(user_start, min(user_start + CHUNK, args.users + 1))
+            db.session.execute(insert(Favorites_people), [
+                {"user_id": user_id, "people_id": people_id}
+                for user_id in users
+                for people_id in rng.sample(range(1, args.people + 1), min(args.favorites_per_user, args.people))
+            ])
+            db.session.execute(insert(Favorites_planets), [
+                {"user_id": user_id, "planets_id": planets_id}
+                for user_id in users
+                for planets_id in rng.sample(range(1, args.planets + 1), min(args.favorites_per_user, args.planets))
+            ])
+        install_sqlite_search(db.session.connection())
+        db.session.commit()
+
+
+def any_id(total):
+    return rng.randint(1, max(total, 1))
+
+
+def person_body():
+    return {"name": f"new person {rng.random()}", "height": 180, "mass": 80, "birth_year": 20, "homeworld": "planet 1"}
+
+
+def planet_body():
+    return {"name": f"new planet {rng.random()}", "climate": "arid", "diameter": 1000, "orbital_period": 300, "population": 5}
+
+
+favorites_total = args.users * args.favorites_per_user
+tokens = {}
+
+
+def auth(user_id):
+    """Authorization header for user_id; tokens are minted once, as a logged in client would keep them."""
+    if user_id not in tokens:
+        with app.app_context():
+            tokens[user_id] = {"Authorization": "Bearer " + create_access_token(identity=str(user_id))}
+    return tokens[user_id]
+
+
+def favorite_owner(favorite_id):
+    # seed() inserta favorites_per_user favoritos por usuario, en orden de user_id
+    return (favorite_id - 1) // max(args.favorites_per_user, 1) + 1
+
+
+def own(user_id, method, url, body=None):
+    return method, url, body, auth(user_id)
+
+
+# Un escenario por endpoint: devuelve (metodo, url, json[, headers])
+SCENARIOS = {
+    "sitemap": lambda: ("GET", "/", None),
+    "cache_stats": lambda: ("GET", "/internal/cache", None),
+    "pool_status": lambda: ("GET", "/internal/pool", None),
+    "metrics": lambda: ("GET", "/metrics", None),
+    "get_all_users": lambda: ("GET", "/users?limit=100", None),
+    "create_user": lambda: ("POST", "/user", {
+        "name": "load", "last_name": "test", "email": f"new{rng.random()}@example.com", "password": "secret"
+    }),
+    "login": lambda: ("POST", "/login", {"email": f"user{any_id(args.users) - 1}@example.com", "password": "secret"}),
+    "get_user_favorite": lambda: (lambda user_id: own(user_id, "GET", f"/user/{user_id}/favorites"))(any_id(args.users)),
+    "add_favorite_planet": lambda: own(any_id(args.users), "POST", f"/favorite/planet/{any_id(args.planets)}"),
+    "add_favorite_people": lambda: own(any_id(args.users), "POST", f"/favorite/people/{any_id(args.people)}"),
+    "add_favorites_bulk": lambda: (lambda user_id: own(user_id, "POST", f"/user/{user_id}/favorites/bulk", {
+        "people": [any_id(args.people) for _ in range(10)], "planets": [any_id(args.planets) for _ in range(10)]
+    }))(any_id(args.users)),
+    "delete_favorites_planet": lambda: (lambda id: own(favorite_owner(id), "DELETE", f"/favorites/planet/{id}"))(any_id(favorites_total)),
+    "delete_favorites_people": lambda: (lambda id: own(favorite_owner(id), "DELETE", f"/favorites/people/{id}"))(any_id(favorites_total)),
+    "get_all_people": lambda: ("GET", "/people?limit=100", None),
+    "get_one_person": lambda: ("GET", f"/people/{any_id(args.people)}", None),
+    "create_person": lambda: ("POST", "/people", person_body()),
+    "create_people_bulk": lambda: ("POST", "/people/bulk", [person_body() for _ in range(50)]),
+    "updated_people": lambda: ("PUT", f"/people/{any_id(args.people)}", {"mass": rng.randint(20, 200)}),
+    "delete_people": lambda: ("DELETE", f"/people/{any_id(args.people)}", None),
+    "get_all_planets": lambda: ("GET", "/planets?limit=100", None),
+    "get_one_planet": lambda: ("GET", f"/planet/{any_id(args.planets)}", None),
+    "create_planet": lambda: ("POST", "/planet", planet_body()),
+    "create_planets_bulk": lambda: ("POST", "/planet/bulk", [planet_body() for _ in range(50)]),
+    "update_planet": lambda: ("PUT", f"/planet/{any_id(args.planets)}", {"population": rng.randint(0, 10 ** 9)}),
+    "delete_planet": lambda: ("DELETE", f"/planet/{any_id(args.planets)}", None),
+    "favorites_stats": lambda: ("GET", f"/stats/favorites?people={any_id(args.people)},{any_id(args.people)}", None),
+    "search_catalog": lambda: ("GET", f"/search?q={rng.choice(['person', 'planet'])}%20{any_id(args.planets)}", None),
+}
+
+# Respuestas 4xx que el escenario provoca a proposito; cualquier otra 4xx/5xx hace fallar la ejecucion
+EXPECTED_ERRORS = {
+    "add_favorite_planet": {409},
+    "add_favorite_people": {409},
+    "delete_favorites_planet": {404},
+    "delete_favorites_people": {404},
+    "delete_people": {404},
+    "delete_planet": {404},
+}
+
+
+def app_endpoints():
+    return sorted({
+        rule.endpoint for rule in app.url_map.iter_rules()
+        if rule.endpoint != "static" and not rule.endpoint.startswith(("admin", "_"))
+        and "." not in rule.endpoint
+    })
+
+
+class TestClientDriver:
+    def __init__(self):
+        self.client = app.test_client()
+
+    def __call__(self, method, url, body, headers=None):
+        return self.client.open(url, method=method, json=body, headers=headers).status_code
+
+    def close(self):
+        pass
+
+
+class GunicornDriver:
+    def __init__(self):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+        self.process = subprocess.Popen(
+            ["gunicorn", "wsgi", "--chdir", SRC, "-w", str(args.workers), "-b", f"127.0.0.1:{self.port}"],
+            env=os.environ.copy()
+        )
+        deadline = time.time() + 30
+        while time.time() < deadline:
+            try:
+                socket.create_connection(("127.0.0.1", self.port), timeout=1).close()
+                return
+            except OSError:
+                time.sleep(0.2)
+        self.close()
+        raise RuntimeError("gunicorn did not start")
+
+    def __call__(self, method, url, body, headers=None):
+        data = json.dumps(body).encode() if body is not None else None
+        req = urllib.request.Request(
+            f"http://127.0.0.1:{self.port}{url}", data=data, method=method,
+            headers={"Content-Type": "application/json", **(headers or {})}
+        )
+        try:
+            with urllib.request.urlopen(req) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as error:
+            return error.code
+
+    def close(self):
+        self.process.terminate()
+        self.process.wait()
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def unexpected_statuses(name, statuses):
+    allowed = EXPECTED_ERRORS.get(name, set())
+    return {status: count for status, count in statuses.items() if int(status) >= 400 and int(status) not in allowed}
+
+
+def run_endpoint(driver, scenario):
+    requests = [scenario() for _ in range(args.requests)]
+    latencies = []
+    statuses = {}
+
+    def call(request):
+        start = time.perf_counter()
+        status = driver(*request)
+        return time.perf_counter() - start, status
+
+    start = time.perf_counter()
+    if args.gunicorn and args.concurrency > 1:
+        with ThreadPoolExecutor(args.concurrency) as pool:
+            results = list(pool.map(call, requests))
+    else:
+        results = [call(request) for request in requests]
+    wall = time.perf_counter() - start
+
+    for latency, status in results:
+        latencies.append(latency)
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    latencies.sort()
+    return {
+        "requests": len(results),
+        "throughput_rps": round(len(results) / wall, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "statuses": statuses,
+    }
+
+
+def compare(report, baseline):
+    regressions = []
+    for endpoint, current in report["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(endpoint)
+        if previous is None:
+            continue
+        if current["p95_ms"] > previous["p95_ms"] * (1 + args.threshold):
+            regressions.append(f"{endpoint}: p95 {previous['p95_ms']}ms -> {current['p95_ms']}ms")
+        if current["throughput_rps"] < previous["throughput_rps"] * (1 - args.threshold):
+            regressions.append(f"{endpoint}: throughput {previous['throughput_rps']} -> {current['throughput_rps']} rps")
+    return regressions
+
+
+def main():
+    missing = [endpoint for endpoint in app_endpoints() if endpoint not in SCENARIOS]
+    if missing:
+        sys.exit(f"No load test scenario for: {', '.join(missing)}")
+
+    seed()
+    driver = GunicornDriver() if args.gunicorn else TestClientDriver()
+    # Las lecturas primero y los DELETE al final para no vaciar las tablas antes de medirlas
+    methods = {name: SCENARIOS[name]()[0] for name in app_endpoints()}
+    order = sorted(methods, key=lambda name: (methods[name] == "DELETE", methods[name] != "GET", name))
+    try:
+        endpoints = {name: run_endpoint(driver, SCENARIOS[name]) for name in order}
+    finally:
+        driver.close()
+
+    report = {
+        "mode": "gunicorn" if args.gunicorn else "test_client",
+        "workers": args.workers if args.gunicorn else 1,
+        "concurrency": args.concurrency if args.gunicorn else 1,
+        "volumes": {
+            "people": args.people, "planets": args.planets,
+            "users": args.users, "favorites_per_user": args.favorites_per_user
+        },
+        "endpoints": endpoints,
+    }
+    print(json.dumps(report, indent=2))
+    unexpected = {name: unexpected_statuses(name, result["statuses"]) for name, result in endpoints.items()}
+    unexpected = {name: statuses for name, statuses in unexpected.items() if statuses}
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+
+    os.remove(db_file)
+
+    if unexpected:
+        print("\n".join(f"{name}: unexpected statuses {statuses}" for name, statuses in unexpected.items()), file=sys.stderr)
+        sys.exit(1)
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline.get("mode") != report["mode"]:
+            print(f"Warning: comparing a {report['mode']} run with a {baseline.get('mode')} baseline", file=sys.stderr)
+        regressions = compare(report, baseline)
+        if regressions:
+            print("\n".join(regressions), file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""full text search
+
+Revision ID: a02f39acbdca
+Revises: 2d0a84f73a3c
+Create Date: 2026-10-18 17:02:41.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a02f39acbdca'
+down_revision = '2d0a84f73a3c'
+branch_labels = None
+depends_on = None
+
+# Copia de search.SQLITE_SEARCH_DDL: las migraciones no importan el codigo de la app
+SQLITE_UPGRADE = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(name, extra, tokenize='trigram')",
+    """CREATE TRIGGER IF NOT EXISTS people_search_insert AFTER INSERT ON people BEGIN
+        INSERT INTO search_index(rowid, name, extra) VALUES (new.id * 2, new.name, coalesce(new.homeworld, ''));
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS people_search_update AFTER UPDATE OF name, homeworld ON people BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 2;
+        INSERT INTO search_index(rowid, name, extra) VALUES (new.id * 2, new.name, coalesce(new.homeworld, ''));
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS people_search_delete AFTER DELETE ON people BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 2;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS planets_search_insert AFTER INSERT ON planets BEGIN
+        INSERT INTO search_index(rowid, name, extra) VALUES (new.id * 2 + 1, new.name, coalesce(new.climate, ''));
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS planets_search_update AFTER UPDATE OF name, climate ON planets BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 2 + 1;
+        INSERT INTO search_index(rowid, name, extra) VALUES (new.id * 2 + 1, new.name, coalesce(new.climate, ''));
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS planets_search_delete AFTER DELETE ON planets BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 2 + 1;
+    END""",
+    "INSERT INTO search_index(rowid, name, extra) SELECT id * 2, name, coalesce(homeworld, '') FROM people",
+    "INSERT INTO search_index(rowid, name, extra) SELECT id * 2 + 1, name, coalesce(climate, '') FROM planets",
+]
+
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS people_search_insert",
+    "DROP TRIGGER IF EXISTS people_search_update",
+    "DROP TRIGGER IF EXISTS people_search_delete",
+    "DROP TRIGGER IF EXISTS planets_search_insert",
+    "DROP TRIGGER IF EXISTS planets_search_update",
+    "DROP TRIGGER IF EXISTS planets_search_delete",
+    "DROP TABLE IF EXISTS search_index",
+]
+
+POSTGRES_UPGRADE = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "ALTER TABLE people ADD COLUMN search tsvector GENERATED ALWAYS AS "
+    "(to_tsvector('simple', name || ' ' || coalesce(homeworld, ''))) STORED",
+    "ALTER TABLE planets ADD COLUMN search tsvector GENERATED ALWAYS AS "
+    "(to_tsvector('simple', name || ' ' || coalesce(climate, ''))) STORED",
+    "CREATE INDEX ix_people_search ON people USING gin (search)",
+    "CREATE INDEX ix_planets_search ON planets USING gin (search)",
+    "CREATE INDEX ix_people_name_trgm ON people USING gin (name gin_trgm_ops)",
+    "CREATE INDEX ix_planets_name_trgm ON planets USING gin (name gin_trgm_ops)",
+]
+
+POSTGRES_DOWNGRADE = [
+    "DROP INDEX IF EXISTS ix_planets_name_trgm",
+    "DROP INDEX IF EXISTS ix_people_name_trgm",
+    "DROP INDEX IF EXISTS ix_planets_search",
+    "DROP INDEX IF EXISTS ix_people_search",
+    "ALTER TABLE planets DROP COLUMN IF EXISTS search",
+    "ALTER TABLE people DROP COLUMN IF EXISTS search",
+]
+
+
+def statements(upgrade):
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        return SQLITE_UPGRADE if upgrade else SQLITE_DOWNGRADE
+    if dialect == "postgresql":
+        return POSTGRES_UPGRADE if upgrade else POSTGRES_DOWNGRADE
+    # Otros motores usan la busqueda por prefijo sobre ix_people_name / ix_planets_name
+    return []
+
+
+def upgrade():
+    for statement in statements(upgrade=True):
+        op.execute(statement)
+
+
+def downgrade():
+    for statement in statements(upgrade=False):
+        op.execute(statement)
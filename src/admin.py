@@ -1,17 +1,96 @@
 import os
+from flask import request, has_request_context
 from flask_admin import Admin
 from models import db, User, Planets, People, Favorites_people, Favorites_planets
 from flask_admin.contrib.sqla import ModelView
 from flask_wtf import FlaskForm
 from wtforms import StringField, PasswordField, BooleanField, validators
+from sqlalchemy import text, or_
+from cache import LocalCache
+from filters import prefix_predicate
 
+# Ultimo id de cada pagina ya vista, para pedir la siguiente con WHERE id > ultimo en lugar de OFFSET
+page_boundaries = LocalCache(max_entries=int(os.getenv("ADMIN_PAGE_BOUNDARIES", 4096)), ttl=600)
 
-class FavoritePlanetView(ModelView):
-    column_list = ('user_id', 'planets_id')
+
+def estimated_count(model):
+    """Row count from the planner statistics on Postgres; None elsewhere or before the first ANALYZE."""
+    if db.engine.dialect.name != "postgresql":
+        return None
+    estimate = db.session.execute(
+        text("SELECT reltuples::bigint FROM pg_class WHERE relname = :name AND relkind = 'r'"),
+        {"name": model.__tablename__}
+    ).scalar()
+    return estimate if estimate is not None and estimate >= 0 else None
+
+
+class ScalableModelView(ModelView):
+    """List views that cost the same on page 1 and on a table with millions of rows.
+
+    - No exact COUNT(*): the total is the Postgres estimate without search or filters, and the
+      prev/next pager otherwise.
+    - In the default id order, moving to the next page seeks past the last id already shown
+      instead of scanning an OFFSET. Jumping straight to a far page still uses OFFSET.
+    - Searches match a prefix with a range on the column index, not ILIKE '%term%'.
+    - Only indexed columns are offered as filters, and relationship columns are joinedloaded.
+    """
+    page_size = 50
+    can_set_page_size = False
+    simple_list_pager = True
+    column_default_sort = ('id', False)
+
+    def _page_key(self, page):
+        args = tuple(sorted((key, value) for key, value in request.args.items(multi=True) if key != 'page'))
+        return f"{self.endpoint}:{page}:{args}"
+
+    def _apply_search(self, query, count_query, joins, count_joins, search):
+        # Toda la busqueda es un prefijo: "Luke Sky" encuentra "Luke Skywalker"
+        term = search.strip()
+        if term:
+            query = query.filter(or_(*(prefix_predicate(field, term) for field, _ in self._search_fields)))
+        return query, count_query, joins, count_joins
+
+    def _apply_pagination(self, query, page, page_size):
+        page_size = page_size or self.page_size
+        if page and page_size and has_request_context() and 'sort' not in request.args:
+            after = page_boundaries.get(self._page_key(page))
+            if after is not None:
+                return query.filter(self.model.id > after).limit(page_size)
+        return super()._apply_pagination(query, page, page_size)
+
+    def get_list(self, page, sort_column, sort_desc, search, filters, execute=True, page_size=None):
+        _, data = super().get_list(page, sort_column, sort_desc, search, filters, execute, page_size)
+        count = estimated_count(self.model) if not search and not filters else None
+        if execute and data and has_request_context() and sort_column is None:
+            page_boundaries.set(self._page_key((page or 0) + 1), data[-1].id)
+        return count, data
+
+
+# ADMIN_LARGE_TABLES=false vuelve a las vistas de Flask-Admin con COUNT(*) y OFFSET
+ListView = ScalableModelView if os.getenv("ADMIN_LARGE_TABLES", "true") == "true" else ModelView
+
+
+class PeopleView(ListView):
+    column_searchable_list = ('name',)
+    column_filters = People.filterable_fields
+
+class PlanetsView(ListView):
+    column_searchable_list = ('name',)
+    column_filters = Planets.filterable_fields
+
+class FavoritePlanetView(ListView):
+    column_list = ('user_id', 'planet', 'planets_id')
+    column_select_related_list = (Favorites_planets.planet,)
+    column_formatters = {'planet': lambda view, context, model, name: model.planet.name}
+    # user_id usa el unique (user_id, planets_id), planets_id su propio indice
+    column_filters = ('user_id', 'planets_id')
     form_columns = ('user_id', 'planets_id')
 
-class FavoritePeopleView(ModelView):
-    column_list = ('user_id', 'people_id')
+class FavoritePeopleView(ListView):
+    column_list = ('user_id', 'people', 'people_id')
+    column_select_related_list = (Favorites_people.people,)
+    column_formatters = {'people': lambda view, context, model, name: model.people.name}
+    column_filters = ('user_id', 'people_id')
     form_columns = ('user_id', 'people_id')
 
 class UserForm(FlaskForm):
@@ -20,8 +99,15 @@ class UserForm(FlaskForm):
     email = StringField('Email', [validators.DataRequired()])
     password = PasswordField('Password', [validators.DataRequired()])
 
-class UserAdmin(ModelView):
+class UserAdmin(ListView):
     form = UserForm
+    column_exclude_list = ('password',)
+    # email es unique, asi que tiene indice
+    column_searchable_list = ('email',)
+    column_filters = ('email',)
+
+    def on_model_change(self, form, model, is_created):
+        model.set_password(form.password.data)
 
 def setup_admin(app):
     app.secret_key = os.environ.get('FLASK_APP_KEY', 'sample key')
@@ -31,11 +117,11 @@ def setup_admin(app):
 
     # Add your models here, for example this is how we add a the User model to the admin
     admin.add_view(UserAdmin(User, db.session))
-    admin.add_view(ModelView(People, db.session))
-    admin.add_view(ModelView(Planets, db.session))
+    admin.add_view(PeopleView(People, db.session))
+    admin.add_view(PlanetsView(Planets, db.session))
     # admin.add_view(ModelView(Favorites_people, db.session))
     admin.add_view(FavoritePlanetView(Favorites_planets, db.session))
     admin.add_view(FavoritePeopleView(Favorites_people, db.session))
     # admin.add_view(FavoriteView(Favorites, db.session))
     # You can duplicate that line to add mew models
-    # admin.add_view(ModelView(YourModelName, db.session))
\ No newline at end of file
+    # admin.add_view(ModelView(YourModelName, db.session))
@@ -2,19 +2,32 @@
 This module takes care of starting the API Server, Loading the DB and Adding the endpoints
 """
 import os
-from flask import Flask, request, jsonify, url_for
-from flask_migrate import Migrate
-from flask_swagger import swagger
+from flask import Flask, request, jsonify, url_for, Response
 from flask_cors import CORS
-from utils import APIException, generate_sitemap
-from admin import setup_admin
+from utils import APIException, get_ids, batch_stmt, in_request_order, generate_sitemap, get_page_args, get_sort, order_by_clauses, paginate, wants_stream, stream_results, select_fields, FastJSONProvider, LazyAdmin
+from filters import apply_filters
+from search import search, include_object, KINDS as SEARCH_KINDS
 from models import db, User, People, Planets, Favorites_people, Favorites_planets
-from flask_jwt_extended import create_access_token, get_jwt_identity, jwt_required, get_current_user,  JWTManager
-from sqlalchemy.exc import NoResultFound
+from cache import entity_cache
+from pool import engine_options, app_engines, instrument_engine, pool_stats
+from replicas import replica_binds, init_replicas, replica_health
+from sql_timing import init_sql_instrumentation
+from metrics import init_metrics
+from compression import init_compression
+from versioning import track_versions, track_user_favorites, conditional, table_version
+from bulk import bulk_create, bulk_status, bulk_add_favorites, update_by_id, PEOPLE_FIELDS, PLANET_FIELDS
+from startup import register_startup_commands
+from stats import FAVORITE_TARGETS, track_favorite_counts, register_stats_commands, top_favorites, favorite_counts
+from auth import init_auth, owner_required
+from group_commit import init_group_commit, write_favorite, add_favorite, delete_favorite
+from flask_jwt_extended import create_access_token, jwt_required, get_current_user
+from sqlalchemy.exc import NoResultFound, IntegrityError
+from sqlalchemy.orm import joinedload, selectinload
 
 
 app = Flask(__name__)
 app.url_map.strict_slashes = False
+app.json = FastJSONProvider(app)
 
 db_url = os.getenv("DATABASE_URL")
 if db_url is not None:
@@ -22,11 +35,39 @@ if db_url is not None:
 else:
     app.config['SQLALCHEMY_DATABASE_URI'] = "sqlite:////tmp/test.db"
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
+app.config['SQLALCHEMY_BINDS'] = replica_binds(engine_options)
 
-MIGRATE = Migrate(app, db)
+# flask_migrate importa alembic (~0.4s); los servidores lo desactivan con MIGRATE_CLI=false
+if os.getenv("MIGRATE_CLI", "true") == "true":
+    from flask_migrate import Migrate
+    MIGRATE = Migrate(app, db, include_object=include_object)
 db.init_app(app)
+engines = app_engines(app, db)
+for engine in engines:
+    instrument_engine(engine)
+init_sql_instrumentation(app, *engines)
+init_metrics(app, *engines)
+init_replicas(app, db)
 CORS(app)
-setup_admin(app)
+init_auth(app)
+init_compression(app)
+init_group_commit(app)
+
+# ADMIN_MODE: "lazy" (default) builds the admin on the first /admin hit, "eager" at startup,
+# "disabled" leaves it out for API-only workers
+ADMIN_MODE = os.getenv("ADMIN_MODE", "lazy")
+if ADMIN_MODE == "eager":
+    from admin import setup_admin
+    setup_admin(app)
+elif ADMIN_MODE == "lazy":
+    app.wsgi_app = LazyAdmin(app)
+entity_cache.watch(People, Planets)
+track_versions(User, People, Planets, Favorites_people, Favorites_planets)
+track_user_favorites(FAVORITE_TARGETS)
+register_startup_commands(app)
+track_favorite_counts()
+register_stats_commands(app)
 
 # Handle/serialize errors like a JSON object
 @app.errorhandler(APIException)
@@ -36,26 +77,48 @@ def handle_invalid_usage(error):
 # generate sitemap with all your endpoints
 @app.route('/')
 def sitemap():
-    return generate_sitemap(app)
+    return generate_sitemap(app, include_admin=ADMIN_MODE != "disabled")
+
+@app.route('/internal/cache', methods=['GET'])
+def cache_stats():
+    return jsonify(entity_cache.stats()), 200
+
+@app.route('/internal/pool', methods=['GET'])
+def pool_status():
+    return jsonify({**pool_stats.serialize(), "replicas": replica_health.serialize()}), 200
 
 #ENDPOINTS PARA USERS:
 
 
 @app.route('/users', methods=['GET'])
+@conditional("user")
 def get_all_users():
     try:
-        data = db.session.scalars(db.select(User)).all()
-
-        if not data:
+        order, sort = get_sort(User)
+        stmt = select_fields(User, order)
+        if wants_stream():
+            return stream_results(stmt.order_by(*order_by_clauses(order)))
+
+        page = get_page_args(sort)
+        if page:
+            data, next_cursor = paginate(stmt, order, sort, *page)
+        else:
+            data = db.session.execute(stmt.order_by(*order_by_clauses(order))).mappings().all()
+
+        if not data and not (page and page[1]):
             return jsonify({"msg": "No users found"}), 404
         
-        result = list(map(lambda item: item.serialize(), data))
+        result = [dict(row) for row in data]
         response_body = {
             "results": result
         }
+        if page:
+            response_body["next"] = next_cursor
         
         return jsonify(response_body), 200
 
+    except APIException:
+        raise
     except Exception as e:
         return jsonify({"msg": "An error occurred", "error": str(e)}), 500
 
@@ -63,21 +126,25 @@ def get_all_users():
 @app.route('/user', methods=['POST'])
 def create_user():
     try:
-        request_body = request.json
-        
+        request_body = request.get_json(silent=True) or {}
+        for field in ("name", "last_name", "email", "password"):
+            if field not in request_body:
+                return jsonify({"error": f"Missing required field: {field}"}), 400
+
         email = request_body["email"]
         password = request_body["password"]
 
         # Verifica si el usuario ya existe
         existing_user = db.session.execute(
             db.select(User).filter_by(email=email)
-        ).scalar_one()
+        ).scalar_one_or_none()
 
         if existing_user:
-            # access_token = create_access_token(identity=email)
+            if not existing_user.check_password(password):
+                return jsonify({"error": "User already exists"}), 409
             return jsonify({
-                # "access_token": access_token,
-                # "user": existing_user.serialize(),
+                "access_token": create_access_token(identity=str(existing_user.id)),
+                "user": existing_user.serialize(),
                 "message": "User already exists, logged in successfully"
             }), 200
 
@@ -85,56 +152,64 @@ def create_user():
         new_user = User(
             name=request_body["name"],
             last_name=request_body["last_name"],
-            email=email,
-            password=password,
-            # is_active=True
+            email=email
         )
+        new_user.set_password(password)
         
         db.session.add(new_user)
         db.session.commit()
 
         return jsonify({
+            "access_token": create_access_token(identity=str(new_user.id)),
             "user": new_user.serialize(),
             "message": "User created successfully"
         }), 201
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+
+@app.route('/login', methods=['POST'])
+def login():
+    try:
+        request_body = request.get_json(silent=True) or {}
+        if "email" not in request_body or "password" not in request_body:
+            return jsonify({"error": "Missing required fields: email, password"}), 400
+
+        user = db.session.execute(
+            db.select(User).filter_by(email=request_body["email"])
+        ).scalar_one_or_none()
+        if user is None or not user.check_password(request_body["password"]):
+            return jsonify({"error": "Invalid email or password"}), 401
+
+        return jsonify({
+            "access_token": create_access_token(identity=str(user.id)),
+            "user": user.serialize()
+        }), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 #ENDPOINTS PARA FAVORITOS
 
 @app.route('/user/<int:user_id>/favorites', methods=['GET'])
+@jwt_required()
+@owner_required
+@conditional("user_favorites:{user_id}")
 def get_user_favorite(user_id):
     try:
-        # Obtener el usuario por ID
-        user = db.session.execute(db.select(User).filter_by(id=user_id)).scalar_one()
+        # Usuario y favoritos en dos sentencias: people por JOIN, planets por selectin
+        user = db.session.execute(
+            db.select(User).filter_by(id=user_id).options(
+                joinedload(User.favorite_people).joinedload(Favorites_people.people),
+                selectinload(User.favorite_planets).joinedload(Favorites_planets.planet)
+            )
+        ).unique().scalar_one_or_none()
         
         if user is None:
             return jsonify({"msg": "User not found"}), 404
         
-        favorite_people_ids = db.session.execute(
-            db.select(Favorites_people.people_id).filter_by(user_id=user_id)
-        ).scalars().all()
-        
-        favorite_planets_ids = db.session.execute(
-            db.select(Favorites_planets.planets_id).filter_by(user_id=user_id)
-        ).scalars().all()
-        
-        # Obtener detalles, ¿Eran necesarios estos detalles?
-        favorite_people = []
-        if favorite_people_ids:
-            favorite_people = db.session.scalars(
-                db.select(People).filter(People.id.in_(favorite_people_ids))
-            ).all()
-        
-        favorite_planets = []
-        if favorite_planets_ids:
-            favorite_planets = db.session.scalars(
-                db.select(Planets).filter(Planets.id.in_(favorite_planets_ids))
-            ).all()
-        
         # Serializar 
-        serialized_people = [person.serialize() for person in favorite_people]
-        serialized_planets = [planet.serialize() for planet in favorite_planets]
+        serialized_people = [fav.people.serialize() for fav in user.favorite_people]
+        serialized_planets = [fav.planet.serialize() for fav in user.favorite_planets]
         
         response_body = {
             "favorite_people": serialized_people,
@@ -147,114 +222,111 @@ def get_user_favorite(user_id):
         return jsonify({"msg": "An error occurred", "error": str(e)}), 500
     
 @app.route('/favorite/planet/<int:planet_id>', methods=['POST'])
+@jwt_required()
 def add_favorite_planet(planet_id):
     try:
-        data = request.get_json()
-
-        if not data or "user_id" not in data:
-            return jsonify({"error": "Missing required field: user_id"}), 400
-
-        user_id = data["user_id"]
-
-        user = db.session.execute(
-            db.select(User).filter_by(id=user_id)
-        ).scalar_one_or_none()
-        
-        if not user:
-            return jsonify({"error": "User not found"}), 404
-
-        planet = db.session.execute(
-            db.select(Planets).filter_by(id=planet_id)
-        ).scalar_one_or_none() 
-        if not planet:
-            return jsonify({"error": "Planet not found"}), 404
-
-        existing_fav = db.session.execute(
-            db.select(Favorites_planets).filter_by(user_id=user_id, planet_id=planet_id)
-        ).scalar_one_or_none()  
-        if existing_fav:
+        data = request.get_json(silent=True) or {}
+        # El usuario sale del token; user_id en el body es opcional y tiene que coincidir
+        user_id = get_current_user()["id"]
+        if data.get("user_id", user_id) != user_id:
+            return jsonify({"error": "You can only add your own favorites"}), 403
+
+        # Un solo INSERT: la FK detecta el planeta inexistente y el unique el duplicado
+        try:
+            inserted = write_favorite(add_favorite, Favorites_planets, "planets_id", user_id, planet_id)
+        except IntegrityError:
+            db.session.rollback()
+            if db.session.get(Planets, planet_id) is None:
+                return jsonify({"error": "Planet not found"}), 404
+            inserted = False
+        if not inserted:
             return jsonify({"error": "Planet already in favorites"}), 409
 
-        new_fav_planet = Favorites_planets(user_id=user_id, planet_id=planet_id)
-        db.session.add(new_fav_planet)
-        db.session.commit()
-
         return jsonify({"message": "Favorite added successfully"}), 201
 
+    except APIException:
+        raise
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @app.route('/favorite/people/<int:people_id>', methods=['POST'])
+@jwt_required()
 def add_favorite_people(people_id):
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True) or {}
+        # El usuario sale del token; user_id en el body es opcional y tiene que coincidir
+        user_id = get_current_user()["id"]
+        if data.get("user_id", user_id) != user_id:
+            return jsonify({"error": "You can only add your own favorites"}), 403
+
+        # Un solo INSERT: la FK detecta el personaje inexistente y el unique el duplicado
+        try:
+            inserted = write_favorite(add_favorite, Favorites_people, "people_id", user_id, people_id)
+        except IntegrityError:
+            db.session.rollback()
+            if db.session.get(People, people_id) is None:
+                return jsonify({"error": "Person not found"}), 404
+            inserted = False
+        if not inserted:
+            return jsonify({"error": "Person already in favorites"}), 409
 
-        if not data or "user_id" not in data:
-            return jsonify({"error": "Missing required field: user_id"}), 400
+        return jsonify({"message": "Favorite added successfully"}), 201
 
-        user_id = data["user_id"]
+    except APIException:
+        raise
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
-        user = db.session.execute(
-            db.select(User).filter_by(id=user_id)
-        ).scalar_one_or_none()
-        
-        if not user:
-            return jsonify({"error": "User not found"}), 404
 
-        person = db.session.execute(
-            db.select(People).filter_by(id=people_id)
-        ).scalar_one_or_none() 
-        if not person:
-            return jsonify({"error": "Person not found"}), 404
+@app.route('/user/<int:user_id>/favorites/bulk', methods=['POST'])
+@jwt_required()
+@owner_required
+def add_favorites_bulk(user_id):
+    try:
+        data = request.get_json()
+        if not isinstance(data, dict):
+            return jsonify({"error": "Expected an object with people and/or planets arrays"}), 400
 
-        # Evitar duplicados
-        existing_fav = db.session.execute(
-            db.select(Favorites_people).filter_by(user_id=user_id, people_id=people_id)
-        ).scalar_one_or_none()  
-        if existing_fav:
-            return jsonify({"error": "Person already in favorites"}), 409
+        people_ids = data.get("people", [])
+        planet_ids = data.get("planets", [])
+        if not isinstance(people_ids, list) or not isinstance(planet_ids, list):
+            return jsonify({"error": "people and planets must be arrays"}), 400
 
-        new_fav_person = Favorites_people(user_id=user_id, people_id=people_id)
-        db.session.add(new_fav_person)
-        db.session.commit()
-
-        return jsonify({"message": "Favorite added successfully"}), 201
+        results = bulk_add_favorites(user_id, people_ids, planet_ids)
+        return jsonify({"results": results}), 201
 
+    except APIException:
+        raise
     except Exception as e:
+        db.session.rollback()
         return jsonify({"error": str(e)}), 500
 
 
 @app.route('/favorites/planet/<int:id>', methods=['DELETE'])
+@jwt_required()
 def delete_favorites_planet(id):
     try:
-
-        favorite_planet = db.session.execute(db.select(Favorites_planets).filter_by(id=id)).scalar_one()
-        
-        if favorite_planet is None:
+        if not write_favorite(delete_favorite, Favorites_planets, id, get_current_user()["id"]):
             return jsonify({"msg": "Planet favorite not found"}), 404
-        
-        db.session.delete(favorite_planet)
-        db.session.commit()
 
         return jsonify({"msg": "Favorite planet deleted successfully"}), 200
 
+    except APIException:
+        raise
     except Exception as e:
         return jsonify({"msg": "An error occurred", "error": str(e)}), 500
     
 @app.route('/favorites/people/<int:id>', methods=['DELETE'])
+@jwt_required()
 def delete_favorites_people(id):
     try:
-      
-        favorite_people = db.session.execute(db.select(Favorites_people).filter_by(id=id)).scalar_one()
-        
-        if favorite_people is None:
+        if not write_favorite(delete_favorite, Favorites_people, id, get_current_user()["id"]):
             return jsonify({"msg": "Person favorite not found"}), 404
-        
-        db.session.delete(favorite_people)
-        db.session.commit()
 
         return jsonify({"msg": "Favorite planet deleted successfully"}), 200
 
+    except APIException:
+        raise
     except Exception as e:
      
         return jsonify({"msg": "An error occurred", "error": str(e)}), 500
@@ -263,39 +335,61 @@ def delete_favorites_people(id):
 #RUTAS PEOPLE:
 
 @app.route('/people', methods=['GET'])
+@conditional("people")
 def get_all_people():
     try:
-        data = db.session.scalars(db.select(People)).all()
-        
-        if not data:
+        ids = get_ids()
+        if ids is not None:
+            # Una sola consulta IN en lugar de un GET por id
+            data = db.session.execute(batch_stmt(People, ids, request.args.get("fields"))).mappings().all()
+            return jsonify(in_request_order(data, ids)), 200
+
+        order, sort = get_sort(People)
+        stmt = apply_filters(select_fields(People, order), People)
+        if wants_stream():
+            return stream_results(stmt.order_by(*order_by_clauses(order)))
+
+        page = get_page_args(sort)
+        if page:
+            data, next_cursor = paginate(stmt, order, sort, *page)
+        else:
+            data = db.session.execute(stmt.order_by(*order_by_clauses(order))).mappings().all()
+        
+        if not data and not (page and page[1]):
             return jsonify({"msg": "No people found"}), 404
         
-        result = list(map(lambda item: item.serialize(), data))
+        result = [dict(row) for row in data]
     
         response_body = {
             "results": result
         }
+        if page:
+            response_body["next"] = next_cursor
         
         return jsonify(response_body), 200
+    except APIException:
+        raise
     except Exception as e:
         return jsonify({"msg": "An error occurred", "error": str(e)}), 500
     
 
 @app.route('/people/<int:id>', methods=['GET'])
+@conditional("people")
 def get_one_person(id):
     try:
-        person = db.session.execute(db.select(People).filter_by(id=id)).scalar_one()
+        version = table_version("people")
+        cached = entity_cache.get("people", id, version)
+        if cached is not None:
+            return Response(cached, mimetype="application/json"), 200
+
+        person = db.session.execute(db.select(People).filter_by(id=id)).scalar_one_or_none()
        
         if person is None:
             return jsonify({"msg": "No person found"}), 404
 
-        result = person.serialize()
-        
-        response_body = {
-            "result": result
-        }
-        
-        return jsonify(response_body), 200
+        body = entity_cache.render(app, person)
+        entity_cache.set("people", id, body, version)
+        return Response(body, mimetype="application/json"), 200
 
     except Exception as e:
         return jsonify({"msg": "An error occurred", "error": str(e)}), 500
@@ -307,8 +401,8 @@ def create_person():
         print(request_body)
 
         existing_person = db.session.execute(
-            db.select(People).filter_by(name=request_body["name"])
-        ).scalar_one()
+            db.select(People.id).filter_by(name=request_body["name"])
+        ).scalar_one_or_none()
 
         if existing_person:
             return jsonify({"result": "person exists"}), 400
@@ -334,6 +428,20 @@ def create_person():
         return jsonify({"error": str(e)}), 500
     
 
+@app.route('/people/bulk', methods=['POST'])
+def create_people_bulk():
+    try:
+        results = bulk_create(People, PEOPLE_FIELDS, request.get_json())
+        created = sum(1 for item in results if item["status"] == "created")
+        return jsonify({"created": created, "results": results}), bulk_status(results)
+
+    except APIException:
+        raise
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+
+
 @app.route('/people/<int:people_id>', methods=['PUT'])
 def updated_people(people_id):
     try:
@@ -341,25 +449,15 @@ def updated_people(people_id):
         if not data:
             return jsonify({"error": "No data provided"}), 400
 
-        person = db.session.execute(
-            db.select(People).filter_by(id=people_id)
-        ).scalar_one_or_none()
-
-        if not person:
+        # Un solo UPDATE ... WHERE id; rowcount 0 es que no existe
+        updated = update_by_id(People, people_id, PEOPLE_FIELDS, data)
+        if updated is None:
+            return jsonify({"error": f"Nothing to update; expected any of {', '.join(PEOPLE_FIELDS)}"}), 400
+        if not updated:
             return jsonify({"error": "Person not found"}), 404
-
-        if 'name' in data:
-            person.name = data['name']
-        if 'height' in data:
-            person.height = data['height']
-        if 'mass' in data:
-            person.mass = data['mass']
-        if 'birth_year' in data:
-            person.birth_year = data['birth_year']
-        if 'homeworld' in data:
-            person.homeworld = data['homeworld']
-
         db.session.commit()
+        # El UPDATE masivo no pasa por el flush que vigila entity_cache
+        entity_cache.invalidate("people", people_id)
         return jsonify({"message": "Person updated successfully"}), 200
 
     except Exception as e:
@@ -370,7 +468,7 @@ def updated_people(people_id):
 def delete_people(id):
     try:
        
-        person = db.session.execute(db.select(People).filter_by(id=id)).scalar_one()
+        person = db.session.get(People, id)
         
         if person is None:
             return jsonify({"msg": "Person not found"}), 404
@@ -387,41 +485,62 @@ def delete_people(id):
 #RUTAS PLANETAS
 
 @app.route('/planets', methods=['GET'])
+@conditional("planets")
 def get_all_planets():
     try:
-        data = db.session.scalars(db.select(Planets)).all()
-
-        if not data:
+        ids = get_ids()
+        if ids is not None:
+            # Una sola consulta IN en lugar de un GET por id
+            data = db.session.execute(batch_stmt(Planets, ids, request.args.get("fields"))).mappings().all()
+            return jsonify(in_request_order(data, ids)), 200
+
+        order, sort = get_sort(Planets)
+        stmt = apply_filters(select_fields(Planets, order), Planets)
+        if wants_stream():
+            return stream_results(stmt.order_by(*order_by_clauses(order)))
+
+        page = get_page_args(sort)
+        if page:
+            data, next_cursor = paginate(stmt, order, sort, *page)
+        else:
+            data = db.session.execute(stmt.order_by(*order_by_clauses(order))).mappings().all()
+
+        if not data and not (page and page[1]):
             return jsonify({"msg": "No planets found"}), 404
         
-        result = list(map(lambda item: item.serialize(), data))
+        result = [dict(row) for row in data]
         
         response_body = {
             "results": result
         }
+        if page:
+            response_body["next"] = next_cursor
         
         return jsonify(response_body), 200
 
+    except APIException:
+        raise
     except Exception as e:
     
         return jsonify({"msg": "An error occurred", "error": str(e)}), 500
     
 @app.route('/planet/<int:id>', methods=['GET'])
+@conditional("planets")
 def get_one_planet(id):
     try:
+        version = table_version("planets")
+        cached = entity_cache.get("planets", id, version)
+        if cached is not None:
+            return Response(cached, mimetype="application/json"), 200
    
-        planet = db.session.execute(db.select(Planets).filter_by(id=id)).scalar_one()
+        planet = db.session.execute(db.select(Planets).filter_by(id=id)).scalar_one_or_none()
         
         if planet is None:
             return jsonify({"msg": "No planet found"}), 404
         
-        result = planet.serialize()
-        
-        response_body = {
-            "result": result
-        }
-        
-        return jsonify(response_body), 200
+        body = entity_cache.render(app, planet)
+        entity_cache.set("planets", id, body, version)
+        return Response(body, mimetype="application/json"), 200
 
     except Exception as e:
       
@@ -433,7 +552,7 @@ def create_planet():
     try:
       
         request_body = request.json
-        planet = db.session.execute(db.select(Planets).filter_by(name = request_body["name"])).scalar_one()
+        planet = db.session.execute(db.select(Planets.id).filter_by(name = request_body["name"])).scalar_one_or_none()
         
         if planet:
             return jsonify({"result": "planet exists"}), 400
@@ -454,6 +573,20 @@ def create_planet():
     except Exception as e:
         return jsonify({"error": str(e)}), 500  
 
+@app.route('/planet/bulk', methods=['POST'])
+def create_planets_bulk():
+    try:
+        results = bulk_create(Planets, PLANET_FIELDS, request.get_json())
+        created = sum(1 for item in results if item["status"] == "created")
+        return jsonify({"created": created, "results": results}), bulk_status(results)
+
+    except APIException:
+        raise
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+
+
 @app.route('/planet/<int:planet_id>', methods=['PUT'])
 def update_planet(planet_id):
     try:
@@ -461,25 +594,13 @@ def update_planet(planet_id):
         if not data:
             return jsonify({"error": "No data provided"}), 400
 
-        planet = db.session.execute(
-            db.select(Planets).filter_by(id=planet_id)
-        ).scalar_one_or_none()
-
-        if not planet:
+        updated = update_by_id(Planets, planet_id, PLANET_FIELDS, data)
+        if updated is None:
+            return jsonify({"error": f"Nothing to update; expected any of {', '.join(PLANET_FIELDS)}"}), 400
+        if not updated:
             return jsonify({"error": "Planet not found"}), 404
-
-        if "name" in data:
-            planet.name = data["name"]
-        if "climate" in data:
-            planet.climate = data["climate"]
-        if "diameter" in data:
-            planet.diameter = data["diameter"]
-        if "orbital_period" in data:
-            planet.orbital_period = data["orbital_period"]
-        if "population" in data:
-            planet.population = data["population"]
-
         db.session.commit()
+        entity_cache.invalidate("planets", planet_id)
         return jsonify({"message": "Planet updated successfully"}), 200
 
     except Exception as e:
@@ -490,7 +611,7 @@ def update_planet(planet_id):
 def delete_planet(id):
     try:
    
-        planet = db.session.execute(db.select(Planets).filter_by(id=id)).scalar_one()
+        planet = db.session.get(Planets, id)
         
        
         if planet is None:
@@ -506,6 +627,62 @@ def delete_planet(id):
 
 
 
+#ESTADISTICAS
+
+@app.route('/stats/favorites', methods=['GET'])
+@conditional("favorites_people", "favorites_planets", "people", "planets")
+def favorites_stats():
+    try:
+        try:
+            limit = min(int(request.args.get("limit", 10)), 100)
+        except ValueError:
+            return jsonify({"msg": "limit must be an integer"}), 400
+
+        response_body = {
+            "top_people": top_favorites(People, max(limit, 1)),
+            "top_planets": top_favorites(Planets, max(limit, 1))
+        }
+        # ?people=1,2&planets=3 agrega el contador de esos ids
+        people_ids, planet_ids = get_ids("people") or [], get_ids("planets") or []
+        if people_ids or planet_ids:
+            response_body["counts"] = {
+                "people": favorite_counts(People, people_ids) if people_ids else {},
+                "planets": favorite_counts(Planets, planet_ids) if planet_ids else {}
+            }
+        return jsonify(response_body), 200
+
+    except APIException:
+        raise
+    except Exception as e:
+        return jsonify({"msg": "An error occurred", "error": str(e)}), 500
+
+
+#BUSQUEDA
+
+@app.route('/search', methods=['GET'])
+@conditional("people", "planets")
+def search_catalog():
+    try:
+        q = request.args.get("q", "").strip()
+        if not q:
+            return jsonify({"msg": "Missing query parameter: q"}), 400
+
+        kind = request.args.get("type")
+        if kind is not None and kind not in SEARCH_KINDS:
+            return jsonify({"msg": f"type must be one of: {', '.join(SEARCH_KINDS)}"}), 400
+        kinds = [kind] if kind else list(SEARCH_KINDS)
+
+        try:
+            limit = min(int(request.args.get("limit", 20)), 100)
+        except ValueError:
+            return jsonify({"msg": "limit must be an integer"}), 400
+
+        return jsonify({"results": search(q, kinds, max(limit, 1))}), 200
+
+    except Exception as e:
+        return jsonify({"msg": "An error occurred", "error": str(e)}), 500
+
+
 # this only runs if `$ python src/app.py` is executed
 if __name__ == '__main__':
     PORT = int(os.environ.get('PORT', 3000))
@@ -0,0 +1,245 @@
+"""
+Async serving mode. Run it with an ASGI server instead of gunicorn's sync workers:
+
+    $ uvicorn asgi:application --app-dir src
+
+The read endpoints below run on SQLAlchemy's asyncio extension (asyncpg on
+Postgres, aiosqlite on SQLite), so one process keeps many DB-bound requests in
+flight. Every other request, including streaming exports, goes to the Flask app
+through asgiref's WSGI adapter, so both modes expose the same API.
+
+The async reads always go to the primary: DATABASE_REPLICA_URLS only routes the
+requests served by the Flask app (replicas.py).
+"""
+import os
+import re
+import time
+import traceback
+import contextvars
+from email.utils import parsedate_to_datetime
+from urllib.parse import parse_qsl
+from werkzeug.http import http_date
+from asgiref.wsgi import WsgiToAsgi
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import joinedload, selectinload
+
+os.environ.setdefault("MIGRATE_CLI", "false")
+
+from app import app
+from models import db, User, People, Planets, Favorites_people, Favorites_planets
+from pool import engine_options
+from utils import APIException, parse_ids, batch_stmt, in_request_order, parse_page_args, parse_sort, projection, page_stmt, next_page, order_by_clauses
+from filters import parse_filters
+from versioning import versions_query, version_tag
+from auth import identity_from_header, user_cache
+from metrics import request_started, request_finished
+from compression import negotiate, should_compress, compressed_body, cached_body
+
+
+def async_database_url(url):
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    if url.startswith("sqlite://"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    return url
+
+
+database_uri = app.config["SQLALCHEMY_DATABASE_URI"]
+engine = create_async_engine(
+    async_database_url(database_uri),
+    **{key: value for key, value in engine_options(database_uri).items() if key != "poolclass"}
+)
+Session = async_sessionmaker(engine, expire_on_commit=False)
+
+# Tiempo en SQL de la peticion en curso, para las mismas metricas que las rutas de Flask
+db_seconds = contextvars.ContextVar("db_seconds", default=None)
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def start_db_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("asgi_query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def stop_db_timer(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["asgi_query_start"].pop()
+    spent = db_seconds.get()
+    if spent is not None:
+        spent[0] += elapsed
+
+
+async def list_rows(session, model, label, query):
+    if "ids" in query:
+        ids = parse_ids(query["ids"])
+        rows = (await session.execute(batch_stmt(model, ids, query.get("fields")))).mappings().all()
+        return 200, in_request_order(rows, ids)
+
+    order, sort = parse_sort(model, query.get("sort"))
+    stmt = db.select(*projection(model, query.get("fields"), order))
+    clauses = parse_filters(model, query)
+    if clauses:
+        stmt = stmt.where(*clauses)
+    page = parse_page_args(query, sort)
+    if page:
+        limit, after = page
+        rows = (await session.execute(page_stmt(stmt, order, limit, after))).mappings().all()
+        rows, next_cursor = next_page(rows, order, limit, sort)
+    else:
+        rows = (await session.execute(stmt.order_by(*order_by_clauses(order)))).mappings().all()
+
+    if not rows and not (page and page[1]):
+        return 404, {"msg": f"No {label} found"}
+    body = {"results": [dict(row) for row in rows]}
+    if page:
+        body["next"] = next_cursor
+    return 200, body
+
+
+async def one_row(session, model, label, id):
+    row = (await session.execute(
+        db.select(*projection(model)).where(model.id == id)
+    )).mappings().one_or_none()
+    if row is None:
+        return 404, {"msg": f"No {label} found"}
+    return 200, {"result": dict(row)}
+
+
+async def user_exists(session, user_id):
+    # Igual que user_lookup_loader en auth.py: el token de un usuario borrado no vale
+    if user_cache.get("user", user_id) is not None:
+        return True
+    return (await session.execute(db.select(User.id).where(User.id == user_id))).first() is not None
+
+
+async def user_favorites(session, user_id):
+    user = (await session.execute(
+        db.select(User).filter_by(id=user_id).options(
+            joinedload(User.favorite_people).joinedload(Favorites_people.people),
+            selectinload(User.favorite_planets).joinedload(Favorites_planets.planet)
+        )
+    )).unique().scalar_one_or_none()
+    if user is None:
+        return 404, {"msg": "User not found"}
+    return 200, {
+        "favorite_people": [fav.people.serialize() for fav in user.favorite_people],
+        "favorite_planets": [fav.planet.serialize() for fav in user.favorite_planets]
+    }
+
+
+# (ruta, manejador, tablas que versionan la respuesta, requiere token, regla de app.py para las metricas)
+# Los nombres de tabla se formatean con los grupos de la ruta, como hace @conditional con los argumentos
+ROUTES = [
+    (re.compile(r"^/users/?$"), lambda s, q: list_rows(s, User, "users", q), ("user",), False, "/users"),
+    (re.compile(r"^/people/?$"), lambda s, q: list_rows(s, People, "people", q), ("people",), False, "/people"),
+    (re.compile(r"^/planets/?$"), lambda s, q: list_rows(s, Planets, "planets", q), ("planets",), False, "/planets"),
+    (re.compile(r"^/people/(\d+)/?$"), lambda s, q, id: one_row(s, People, "person", int(id)), ("people",), False,
+        "/people/<int:id>"),
+    (re.compile(r"^/planet/(\d+)/?$"), lambda s, q, id: one_row(s, Planets, "planet", int(id)), ("planets",), False,
+        "/planet/<int:id>"),
+    (re.compile(r"^/user/(\d+)/favorites/?$"), lambda s, q, id: user_favorites(s, int(id)),
+        ("user_favorites:{0}",), True, "/user/<int:user_id>/favorites"),
+]
+
+
+def match_route(scope):
+    if scope["type"] != "http" or scope["method"] != "GET":
+        return None
+    for pattern, handler, tables, protected, rule in ROUTES:
+        match = pattern.match(scope["path"])
+        if match:
+            return handler, match.groups(), tables, protected, rule
+    return None
+
+
+def not_modified(headers, etag, last_modified):
+    if_none_match = headers.get("if-none-match")
+    if if_none_match:
+        tags = {tag.strip().removeprefix("W/").strip('"') for tag in if_none_match.split(",")}
+        return etag in tags or "*" in tags
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            return last_modified <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+async def send_json(send, status, body, extra_headers=(), encoding=None, etag=None):
+    payload = app.json.dumps(body).encode() if body is not None else b""
+    headers = [(b"content-type", b"application/json")] if body is not None else []
+    headers.append((b"vary", b"Accept-Encoding"))
+    if encoding and should_compress(status, "application/json", len(payload)):
+        payload = compressed_body(payload, encoding, etag)
+        headers.append((b"content-encoding", encoding.encode()))
+    headers += list(extra_headers)
+    return await send_body(send, payload, headers, status)
+
+
+async def send_body(send, payload, headers, status=200):
+    headers = headers + [(b"content-length", str(len(payload)).encode())]
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": payload})
+    return status
+
+
+flask_application = WsgiToAsgi(app)
+
+
+async def application(scope, receive, send):
+    route = match_route(scope)
+    headers = {key.decode().lower(): value.decode() for key, value in scope.get("headers", [])}
+    query = dict(parse_qsl(scope["query_string"].decode())) if route else {}
+    if route is None or "stream" in query or "application/x-ndjson" in headers.get("accept", ""):
+        return await flask_application(scope, receive, send)
+
+    request_started()
+    start = time.perf_counter()
+    spent = [0.0]
+    db_seconds.set(spent)
+    status = 500
+    try:
+        status = await serve(scope, send, headers, query, route)
+    finally:
+        request_finished("GET", route[4], status, time.perf_counter() - start, spent[0])
+
+
+async def serve(scope, send, headers, query, route):
+    """Answers one routed GET; returns the status sent."""
+    handler, params, tables, protected, _ = route
+    tables = [table.format(*params) for table in tables]
+    try:
+        if protected and identity_from_header(app, headers.get("authorization")) != int(params[0]):
+            return await send_json(send, 403, {"msg": "You can only access your own favorites"})
+        async with Session() as session:
+            if protected and not await user_exists(session, int(params[0])):
+                return await send_json(send, 401, {"msg": f"Error loading the user {params[0]}"})
+            versions = {
+                row.table_name: (row.version, row.updated_at)
+                for row in (await session.execute(versions_query(tables))).all()
+            }
+            full_path = scope["path"] + "?" + scope["query_string"].decode()
+            encoding = negotiate(headers.get("accept-encoding"))
+            etag, last_modified = version_tag(tables, versions, full_path, headers.get("accept", ""), encoding)
+            cache_headers = [(b"etag", f'"{etag}"'.encode())]
+            if last_modified is not None:
+                cache_headers.append((b"last-modified", http_date(last_modified).encode()))
+
+            if not_modified(headers, etag, last_modified):
+                return await send_json(send, 304, None, cache_headers)
+            cached = cached_body(etag, encoding) if encoding else None
+            if cached is not None:
+                return await send_body(send, cached[0], [
+                    (b"content-type", cached[1].encode()), (b"vary", b"Accept-Encoding"),
+                    (b"content-encoding", encoding.encode())
+                ] + cache_headers)
+            status, body = await handler(session, query, *params)
+    except APIException as error:
+        return await send_json(send, error.status_code, error.to_dict())
+    except Exception as error:
+        traceback.print_exc()
+        return await send_json(send, 500, {"msg": "An error occurred", "error": str(error)})
+    if status != 200:
+        return await send_json(send, status, body, (), encoding)
+    return await send_json(send, status, body, cache_headers, encoding, etag)
@@ -0,0 +1,88 @@
+import os
+import secrets
+import logging
+from datetime import timedelta
+from functools import wraps
+from flask import jsonify
+from flask_jwt_extended import JWTManager, decode_token, get_current_user
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt.exceptions import PyJWTError
+from utils import APIException
+from models import db, User
+from cache import EntityCache, LocalCache
+
+logger = logging.getLogger("auth")
+
+# Registros de usuario por id, para no hacer un SELECT de User en cada peticion autenticada.
+# Se invalida al commitear cambios en User (ver EntityCache.watch)
+user_cache = EntityCache(LocalCache(
+    max_entries=int(os.getenv("AUTH_USER_CACHE_SIZE", 1024)),
+    ttl=int(os.getenv("AUTH_USER_CACHE_TTL", 300))
+))
+
+
+def load_user(id):
+    """The public record of user `id`, from the cache or one SELECT; None if it does not exist."""
+    record = user_cache.get("user", id)
+    if record is None:
+        row = db.session.execute(
+            db.select(*(getattr(User, field) for field in User.public_fields)).where(User.id == id)
+        ).mappings().one_or_none()
+        if row is None:
+            return None
+        record = dict(row)
+        user_cache.set("user", id, record)
+    return record
+
+
+# Valores de ejemplo publicados (.env.example, admin.py): firmar con ellos es como no firmar
+PLACEHOLDER_SECRETS = {"any key works", "sample key"}
+
+
+def init_auth(app):
+    secret = os.getenv("JWT_SECRET_KEY")
+    if secret in PLACEHOLDER_SECRETS:
+        logger.warning("JWT_SECRET_KEY is a published example value; ignoring it")
+        secret = None
+    if not secret:
+        # Nunca una clave conocida: sin configurar, los tokens solo valen en este proceso
+        secret = secrets.token_urlsafe(32)
+        logger.warning(
+            "JWT_SECRET_KEY is not set; using a random key. Tokens stop working on restart "
+            "and are not accepted by other workers"
+        )
+    app.config["JWT_SECRET_KEY"] = secret
+    app.config["JWT_ACCESS_TOKEN_EXPIRES"] = timedelta(minutes=int(os.getenv("JWT_ACCESS_TOKEN_MINUTES", 60)))
+    jwt = JWTManager(app)
+
+    @jwt.user_lookup_loader
+    def user_lookup(jwt_header, jwt_data):
+        # Un usuario borrado deja de autenticar: el loader devuelve None y la peticion es un 401
+        return load_user(int(jwt_data["sub"]))
+
+    user_cache.watch(User)
+    return jwt
+
+
+def owner_required(view):
+    """403 unless the <user_id> in the URL is the authenticated user; goes under @jwt_required().
+
+    Runs before @conditional so neither a 304 nor a cached body reaches another user.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if get_current_user()["id"] != kwargs["user_id"]:
+            return jsonify({"msg": "You can only access your own favorites"}), 403
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def identity_from_header(app, authorization):
+    """User id in a "Bearer <token>" header, for code outside a Flask request (asgi.py)."""
+    if not authorization or not authorization.startswith("Bearer "):
+        raise APIException("Missing Authorization Header", status_code=401)
+    try:
+        with app.app_context():
+            return int(decode_token(authorization[len("Bearer "):])["sub"])
+    except (JWTExtendedException, PyJWTError) as error:
+        raise APIException(str(error), status_code=401)
@@ -0,0 +1,192 @@
+import os
+from sqlalchemy import insert, update
+from sqlalchemy.dialects import postgresql, sqlite
+from utils import APIException
+from versioning import mark_written, mark_favorites_of, user_favorites_key
+from stats import FAVORITE_TARGETS, count_inserted
+from models import db, People, Planets, Favorites_people, Favorites_planets
+
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", 1000))
+
+PEOPLE_FIELDS = ("name", "height", "mass", "birth_year", "homeworld")
+PLANET_FIELDS = ("name", "climate", "diameter", "orbital_period", "population")
+
+
+def insert_ignoring_duplicates(model, values):
+    """One INSERT that skips a row breaking a unique constraint; True when the row was inserted.
+
+    Uses ON CONFLICT DO NOTHING on Postgres and SQLite. Elsewhere a duplicate raises
+    IntegrityError like any other constraint. Foreign key violations always raise.
+    """
+    dialect = db.engine.dialect.name
+    if dialect not in ("postgresql", "sqlite"):
+        db.session.execute(insert(model), values)
+        return True
+    stmt = (postgresql.insert if dialect == "postgresql" else sqlite.insert)(model)
+    # RETURNING id: sin fila devuelta es que el conflicto la descarto
+    stmt = stmt.on_conflict_do_nothing().returning(model.id)
+    # Un duplicado no cambia nada: ni invalida los ETags de la tabla ni suma favoritos
+    inserted = db.session.execute(
+        stmt, values, execution_options={"track_versions": False, "count_favorites": False}
+    ).first() is not None
+    if inserted:
+        mark_written(db.session, model.__tablename__)
+        if model in FAVORITE_TARGETS:
+            count_inserted(db.session, model, values)
+            mark_written(db.session, user_favorites_key(values["user_id"]))
+    return inserted
+
+
+def insert_favorites_ignoring_duplicates(fav_model, user_id, column, ids):
+    """One multi-row INSERT ... ON CONFLICT DO NOTHING of user_id's favorites; the ids that went in.
+
+    Postgres and SQLite only. A concurrent request adding the same favorites makes
+    those rows come back as not inserted instead of raising IntegrityError.
+    """
+    dialect = db.engine.dialect.name
+    fav_column = getattr(fav_model, column)
+    stmt = (postgresql.insert if dialect == "postgresql" else sqlite.insert)(fav_model)
+    stmt = stmt.values([{"user_id": user_id, column: id} for id in ids]).on_conflict_do_nothing().returning(fav_column)
+    inserted = set(db.session.scalars(
+        stmt, execution_options={"track_versions": False, "count_favorites": False}
+    ).all())
+    if inserted:
+        mark_written(db.session, fav_model.__tablename__, user_favorites_key(user_id))
+        count_inserted(db.session, fav_model, [{"user_id": user_id, column: id} for id in inserted])
+    return inserted
+
+
+def update_by_id(model, id, fields, data):
+    """Single UPDATE ... WHERE id = :id with the allowed fields present in data.
+
+    Returns the matched row count (0 means no such id), or None when data has no allowed field.
+    """
+    values = {field: data[field] for field in fields if field in data}
+    if not values:
+        return None
+    result = db.session.execute(
+        update(model).where(model.id == id).values(values),
+        execution_options={"synchronize_session": False, "track_versions": False}
+    )
+    if result.rowcount:
+        mark_written(db.session, model.__tablename__)
+        mark_favorites_of(db.session, model, [id])
+    return result.rowcount
+
+
+def check_batch(items):
+    if not isinstance(items, list) or not items:
+        raise APIException("Expected a non empty JSON array", status_code=400)
+    if len(items) > BULK_MAX_ITEMS:
+        raise APIException(f"At most {BULK_MAX_ITEMS} items per request", status_code=400)
+
+
+def field_error(model, field, value):
+    """Why value cannot be stored in model.field, or None when it fits the column."""
+    column = getattr(model, field)
+    if value is None:
+        return None if column.nullable else f"{field} cannot be null"
+    python_type = column.type.python_type
+    # bool es subclase de int, pero true no es una altura valida
+    if not isinstance(value, python_type) or isinstance(value, bool):
+        return f"{field} must be of type {python_type.__name__}"
+    length = getattr(column.type, "length", None)
+    if length and len(value) > length:
+        return f"{field} must be at most {length} characters"
+    return None
+
+
+def bulk_create(model, fields, items):
+    """Validates items, skips names already stored and inserts the rest in one executemany.
+
+    Returns one result dict per item, in request order.
+    """
+    check_batch(items)
+    results = [None] * len(items)
+    valid = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            results[index] = {"index": index, "status": "invalid", "error": "Expected an object"}
+            continue
+        missing = [field for field in fields if field not in item]
+        if missing:
+            results[index] = {"index": index, "status": "invalid", "error": f"Missing field: {missing[0]}"}
+            continue
+        error = next(filter(None, (field_error(model, field, item[field]) for field in fields)), None)
+        if error:
+            results[index] = {"index": index, "status": "invalid", "error": error}
+            continue
+        valid.append(index)
+
+    names = {items[index]["name"] for index in valid}
+    existing = set(db.session.scalars(db.select(model.name).where(model.name.in_(names))).all()) if names else set()
+
+    rows = []
+    row_indexes = []
+    for index in valid:
+        name = items[index]["name"]
+        if name in existing:
+            results[index] = {"index": index, "status": "exists", "name": name}
+            continue
+        existing.add(name)
+        rows.append({field: items[index][field] for field in fields})
+        row_indexes.append(index)
+
+    if rows:
+        ids = db.session.scalars(
+            insert(model).returning(model.id, sort_by_parameter_order=True), rows
+        ).all()
+        for index, new_id in zip(row_indexes, ids):
+            results[index] = {"index": index, "status": "created", "id": new_id}
+    db.session.commit()
+    return results
+
+
+def bulk_status(results):
+    """201 when an item was created, 400 when every item was invalid, 200 otherwise."""
+    if any(item["status"] == "created" for item in results):
+        return 201
+    if all(item["status"] == "invalid" for item in results):
+        return 400
+    return 200
+
+
+def bulk_add_favorites(user_id, people_ids, planet_ids):
+    """Adds many favorites for one existing user (the authenticated one); returns one result per id."""
+    check_batch(people_ids + planet_ids)
+    if not all(isinstance(id, int) for id in people_ids + planet_ids):
+        raise APIException("Ids must be integers", status_code=400)
+
+    results = []
+    for ids, target, fav_model, column, label in (
+        (people_ids, People, Favorites_people, "people_id", "people"),
+        (planet_ids, Planets, Favorites_planets, "planets_id", "planet"),
+    ):
+        if not ids:
+            continue
+        fav_column = getattr(fav_model, column)
+        found = set(db.session.scalars(db.select(target.id).where(target.id.in_(ids))).all())
+        candidates = list(dict.fromkeys(id for id in ids if id in found))
+        if candidates and db.engine.dialect.name in ("postgresql", "sqlite"):
+            # El unique decide: sin SELECT previo no hay carrera entre dos peticiones con los mismos ids
+            inserted = insert_favorites_ignoring_duplicates(fav_model, user_id, column, candidates)
+        elif candidates:
+            already = set(db.session.scalars(
+                db.select(fav_column).where(fav_model.user_id == user_id, fav_column.in_(candidates))
+            ).all())
+            inserted = [id for id in candidates if id not in already]
+            if inserted:
+                db.session.execute(insert(fav_model), [{"user_id": user_id, column: id} for id in inserted])
+        else:
+            inserted = ()
+        inserted = set(inserted)
+        for id in ids:
+            if id not in found:
+                results.append({"type": label, "id": id, "status": "not_found"})
+            elif id in inserted:
+                inserted.discard(id)
+                results.append({"type": label, "id": id, "status": "created"})
+            else:
+                results.append({"type": label, "id": id, "status": "exists"})
+    db.session.commit()
+    return results
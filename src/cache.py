@@ -0,0 +1,189 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from models import db
+
+
+class LocalCache:
+    """In-process LRU cache with a per-entry TTL, good for a single worker."""
+
+    def __init__(self, max_entries=1024, ttl=60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class RedisCache:
+    """Cache shared by every gunicorn worker, needs the optional `redis` package."""
+
+    def __init__(self, url, ttl=60, prefix="entity:"):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return value.decode() if value is not None else None
+
+    def set(self, key, value):
+        self.client.set(self.prefix + key, value, ex=self.ttl)
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def clear(self):
+        for key in self.client.scan_iter(self.prefix + "*"):
+            self.client.delete(key)
+
+
+def create_backend():
+    ttl = int(os.getenv("CACHE_TTL", 60))
+    if os.getenv("CACHE_BACKEND", "local") == "redis":
+        return RedisCache(os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0"), ttl=ttl)
+    return LocalCache(max_entries=int(os.getenv("CACHE_MAX_ENTRIES", 1024)), ttl=ttl)
+
+
+class EntityCache:
+    """Pre-serialized JSON bodies keyed by table name + primary key.
+
+    A body stored with a `version` is only returned to a get() that asks for that same
+    version, so it always matches the ETag computed from the table version.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(table, id):
+        return f"{table}:{id}"
+
+    def get(self, table, id, version=None):
+        value = self.backend.get(self.key(table, id))
+        if value is not None and version is not None:
+            # Escrito por otro worker con una version mas nueva o mas vieja: es un fallo
+            stored, _, value = value.partition("|")
+            if stored != str(version):
+                value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, table, id, value, version=None):
+        if version is not None:
+            value = f"{version}|{value}"
+        self.backend.set(self.key(table, id), value)
+
+    @staticmethod
+    def render(app, obj):
+        """The body GET /people/<id> and GET /planet/<id> return for obj."""
+        return app.json.dumps({"result": obj.serialize()}, separators=(",", ":"))
+
+    def invalidate(self, table, id):
+        self.backend.delete(self.key(table, id))
+
+    def stats(self):
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+    def watch(self, *models):
+        """Invalidates cached rows of `models` whenever a session commits a change to them.
+
+        Listens on every Session, so edits made through the admin views are covered too.
+        """
+        tables = {model.__tablename__ for model in models}
+        # Una clave por cache: user_cache y entity_cache vigilan las mismas sesiones
+        info_key = f"entity_cache_pending:{id(self)}"
+
+        @event.listens_for(Session, "after_flush")
+        def collect(session, flush_context):
+            pending = session.info.setdefault(info_key, set())
+            for obj in list(session.dirty) + list(session.deleted):
+                table = getattr(obj, "__tablename__", None)
+                if table in tables:
+                    pending.add((table, obj.id))
+
+        @event.listens_for(Session, "after_commit")
+        def flush_pending(session):
+            for table, id in session.info.pop(info_key, ()):
+                self.invalidate(table, id)
+
+        @event.listens_for(Session, "after_rollback")
+        def drop_pending(session):
+            session.info.pop(info_key, None)
+
+
+entity_cache = EntityCache(create_backend())
+
+
+def warm_entity_cache(app, *models, limit=500):
+    """Pre-loads the first `limit` rows of each model, e.g. before gunicorn forks its workers."""
+    from versioning import table_version
+    with app.app_context():
+        for model in models:
+            # La version antes que las filas: si alguien escribe en medio, la entrada queda vieja y no se usa
+            version = table_version(model.__tablename__)
+            for obj in db.session.scalars(db.select(model).order_by(model.id).limit(limit)):
+                entity_cache.set(model.__tablename__, obj.id, entity_cache.render(app, obj), version)
+        db.session.remove()
+
+
+def keep_entity_cache_warm(app, *models, limit=500):
+    """Reloads the warmed rows in a daemon thread just before they expire (every 0.8 * CACHE_TTL).
+
+    Each reload is one SELECT per model, and entries never get older than CACHE_TTL.
+    """
+    if limit <= 0:
+        return None
+    interval = int(os.getenv("CACHE_TTL", 60)) * 0.8
+
+    def refresh():
+        while True:
+            time.sleep(interval)
+            try:
+                warm_entity_cache(app, *models, limit=limit)
+            except Exception:
+                # Base de datos caida un momento: se reintenta en la siguiente vuelta
+                pass
+
+    thread = threading.Thread(target=refresh, name="cache-warmer", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,89 @@
+"""
+Negotiated response compression: brotli when the optional `brotli` package is
+installed and the client accepts it, gzip otherwise.
+
+Bodies under COMPRESS_MIN_SIZE bytes go out as they are. Responses with an
+ETag (the @conditional routes) keep their compressed bytes in a per-process
+LRU keyed by ETag and encoding. The ETag changes with the table versions, so a
+repeat hit is answered from those bytes without running the view, and never
+with stale data.
+"""
+import os
+import gzip
+from flask import request
+from werkzeug.http import parse_accept_header
+from cache import LocalCache
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", 500))
+GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", 6))
+BROTLI_LEVEL = int(os.getenv("COMPRESS_BROTLI_LEVEL", 4))
+CACHE_MAX_BYTES = int(os.getenv("COMPRESS_CACHE_MAX_BYTES", 1024 * 1024))
+COMPRESSIBLE = ("application/json", "application/x-ndjson", "text/html", "text/plain")
+
+compressed_bodies = LocalCache(
+    max_entries=int(os.getenv("COMPRESS_CACHE_ENTRIES", 256)),
+    ttl=int(os.getenv("COMPRESS_CACHE_TTL", 300))
+)
+
+
+def encodings():
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate(accept_encoding):
+    """The encoding to answer with for an Accept-Encoding header, or None."""
+    if os.getenv("COMPRESS_ENABLED", "true").lower() != "true" or not accept_encoding:
+        return None
+    return parse_accept_header(accept_encoding).best_match(encodings())
+
+
+def compress(data, encoding):
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_LEVEL)
+    # mtime=0: mismos bytes para el mismo body, cacheables por ETag
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def cached_body(etag, encoding):
+    """(body, mimetype) compressed earlier for this ETag and encoding, or None."""
+    return compressed_bodies.get(f"{etag}:{encoding}")
+
+
+def compressed_body(data, encoding, etag=None, mimetype="application/json"):
+    """Compressed data, reusing the bytes cached for etag when there are some."""
+    if etag is None:
+        return compress(data, encoding)
+    cached = cached_body(etag, encoding)
+    if cached is not None:
+        return cached[0]
+    body = compress(data, encoding)
+    if len(body) <= CACHE_MAX_BYTES:
+        compressed_bodies.set(f"{etag}:{encoding}", (body, mimetype))
+    return body
+
+
+def should_compress(status, mimetype, size):
+    return status == 200 and mimetype in COMPRESSIBLE and size >= MIN_SIZE
+
+
+def init_compression(app):
+    @app.after_request
+    def compress_response(response):
+        if response.direct_passthrough or response.is_streamed:
+            return response
+        response.vary.add("Accept-Encoding")
+        if "Content-Encoding" in response.headers:
+            return response
+        encoding = negotiate(request.headers.get("Accept-Encoding"))
+        data = response.get_data()
+        if encoding is None or not should_compress(response.status_code, response.mimetype, len(data)):
+            return response
+        etag, _ = response.get_etag()
+        response.set_data(compressed_body(data, encoding, etag, response.mimetype))
+        response.headers["Content-Encoding"] = encoding
+        return response
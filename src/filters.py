@@ -0,0 +1,67 @@
+import re
+from flask import request
+from utils import APIException
+
+# population[gte]=1000 -> ("population", "gte")
+FILTER_PARAM = re.compile(r"^(\w+)\[(\w+)\]$")
+
+OPERATORS = {
+    "eq": lambda column, value: column == value,
+    "ne": lambda column, value: column != value,
+    "gt": lambda column, value: column > value,
+    "gte": lambda column, value: column >= value,
+    "lt": lambda column, value: column < value,
+    "lte": lambda column, value: column <= value,
+}
+
+
+def prefix_predicate(column, prefix):
+    # Rango [prefix, siguiente prefijo) en vez de LIKE, asi usa el indice btree en cualquier motor
+    if not prefix:
+        raise APIException(f"{column.key}[prefix] cannot be empty", status_code=400)
+    # U+10FFFF no tiene siguiente: se quita y se incrementa el caracter anterior
+    stem = prefix.rstrip(chr(0x10FFFF))
+    if not stem:
+        return column >= prefix
+    following = ord(stem[-1]) + 1
+    # Los surrogates no se pueden codificar para la base de datos; se saltan
+    if 0xD800 <= following <= 0xDFFF:
+        following = 0xE000
+    return (column >= prefix) & (column < stem[:-1] + chr(following))
+
+
+def parse_filters(model, args):
+    """WHERE clauses for the ?field=value / ?field[op]=value parameters.
+
+    Only model.filterable_fields can be filtered; other plain parameters are ignored.
+    """
+    filterable = getattr(model, "filterable_fields", ())
+    clauses = []
+    for key, raw in args.items():
+        match = FILTER_PARAM.match(key)
+        field, operator = (match.group(1), match.group(2)) if match else (key, "eq")
+        if field not in filterable:
+            if match:
+                raise APIException(f"Cannot filter by {field}", status_code=400)
+            continue
+        column = getattr(model, field)
+        python_type = column.type.python_type
+
+        if operator == "prefix":
+            if python_type is not str:
+                raise APIException(f"{field}[prefix] only works on text fields", status_code=400)
+            clauses.append(prefix_predicate(column, raw))
+            continue
+        if operator not in OPERATORS:
+            raise APIException(f"Unknown filter operator: {operator}", status_code=400)
+        try:
+            value = python_type(raw)
+        except ValueError:
+            raise APIException(f"{field} must be of type {python_type.__name__}", status_code=400)
+        clauses.append(OPERATORS[operator](column, value))
+    return clauses
+
+
+def apply_filters(stmt, model):
+    clauses = parse_filters(model, request.args)
+    return stmt.where(*clauses) if clauses else stmt
@@ -0,0 +1,172 @@
+import os
+import time
+import queue
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from sqlalchemy.exc import IntegrityError
+from utils import APIException
+from models import db
+from bulk import insert_ignoring_duplicates
+
+# FAVORITES_GROUP_COMMIT=true junta las escrituras de favoritos de varias peticiones en una transaccion
+GROUP_COMMIT_ENABLED = os.getenv("FAVORITES_GROUP_COMMIT", "false") == "true"
+GROUP_COMMIT_WINDOW_MS = float(os.getenv("GROUP_COMMIT_WINDOW_MS", 2))
+GROUP_COMMIT_MAX_BATCH = int(os.getenv("GROUP_COMMIT_MAX_BATCH", 200))
+GROUP_COMMIT_MAX_QUEUE = int(os.getenv("GROUP_COMMIT_MAX_QUEUE", 2000))
+GROUP_COMMIT_TIMEOUT = float(os.getenv("GROUP_COMMIT_TIMEOUT", 5))
+
+
+def add_favorite(model, column, user_id, target_id):
+    """Adds one favorite without committing; False if it already was one.
+
+    Raises IntegrityError when the target does not exist (foreign key).
+    """
+    return insert_ignoring_duplicates(model, {"user_id": user_id, column: target_id})
+
+
+def delete_favorite(model, id, user_id):
+    """Deletes favorite `id` of user_id without committing; False if there is no such favorite."""
+    favorite = db.session.execute(
+        db.select(model).filter_by(id=id, user_id=user_id)
+    ).scalar_one_or_none()
+    if favorite is None:
+        return False
+    db.session.delete(favorite)
+    db.session.flush()
+    return True
+
+
+class GroupCommitter:
+    """Runs favorite writes from many requests in one transaction and one commit.
+
+    Requests queue their write and wait. A single thread per worker takes whatever
+    arrives within `window` seconds (up to `max_batch` writes), runs it all and
+    commits once, then hands each request its own result. If one write breaks a
+    constraint the batch is rolled back and replayed one write per transaction,
+    so only that request sees the IntegrityError. A full queue answers 503
+    instead of letting latency grow without limit. A request that times out
+    while its write is still queued cancels it, so the write is never applied.
+    """
+
+    def __init__(self, app, window=0.002, max_batch=200, max_queue=2000, timeout=5):
+        self.app = app
+        self.window = window
+        self.max_batch = max_batch
+        self.timeout = timeout
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.batches = 0
+        self.writes = 0
+        self.replays = 0
+        self.rejected = 0
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _start(self):
+        # Se arranca con la primera escritura: ni la CLI ni el proceso padre de gunicorn crean el hilo
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="group-commit", daemon=True)
+                self._thread.start()
+
+    def submit(self, fn, *args):
+        """Result of fn(*args) once its batch has committed; re-raises what fn raised."""
+        self._start()
+        future = Future()
+        try:
+            self.queue.put_nowait((future, fn, args))
+        except queue.Full:
+            self.rejected += 1
+            raise APIException("Too many pending favorite writes, retry later", status_code=503)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            # Aun en cola: se cancela y no se escribe. Ya en un lote: puede acabar commiteada
+            if future.cancel():
+                raise APIException("Favorite write timed out, it was not applied", status_code=503)
+            raise APIException(
+                "Favorite write timed out, it may still be applied", status_code=503, payload={"applied": None}
+            )
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            # Las peticiones que ya se rindieron cancelaron su future: no se escriben
+            batch = [item for item in batch if item[0].set_running_or_notify_cancel()]
+            if batch:
+                self._flush(batch)
+
+    def _flush(self, batch):
+        with self.app.app_context():
+            try:
+                results = [fn(*args) for _, fn, args in batch]
+                db.session.commit()
+            except IntegrityError:
+                db.session.rollback()
+                self.replays += 1
+                for item in batch:
+                    self._flush_one(*item)
+                return
+            except Exception as error:
+                db.session.rollback()
+                for future, _, _ in batch:
+                    future.set_exception(error)
+                return
+        self.batches += 1
+        self.writes += len(batch)
+        for (future, _, _), result in zip(batch, results):
+            future.set_result(result)
+
+    def _flush_one(self, future, fn, args):
+        try:
+            result = fn(*args)
+            db.session.commit()
+        except Exception as error:
+            db.session.rollback()
+            future.set_exception(error)
+            return
+        self.batches += 1
+        self.writes += 1
+        future.set_result(result)
+
+    def serialize(self):
+        return {
+            "batches": self.batches,
+            "writes": self.writes,
+            "writes_per_batch": round(self.writes / self.batches, 2) if self.batches else None,
+            "replayed_batches": self.replays,
+            "rejected": self.rejected,
+            "queued": self.queue.qsize(),
+        }
+
+
+group_committer = None
+
+
+def init_group_commit(app):
+    global group_committer
+    if GROUP_COMMIT_ENABLED:
+        group_committer = GroupCommitter(
+            app, window=GROUP_COMMIT_WINDOW_MS / 1000, max_batch=GROUP_COMMIT_MAX_BATCH,
+            max_queue=GROUP_COMMIT_MAX_QUEUE, timeout=GROUP_COMMIT_TIMEOUT
+        )
+    return group_committer
+
+
+def write_favorite(fn, *args):
+    """fn(*args) committed: batched with other requests when group commit is on, alone otherwise."""
+    if group_committer is not None:
+        # Devolver la conexion al pool antes de esperar: con todas retenidas el committer no tendria una
+        db.session.close()
+        return group_committer.submit(fn, *args)
+    result = fn(*args)
+    db.session.commit()
+    return result
@@ -0,0 +1,121 @@
+"""
+Gunicorn settings, selected with GUNICORN_PROFILE:
+
+    development  one sync worker with autoreload
+    production   gthread workers sized from the usable CPUs (default)
+    gevent       event loop workers for many slow, IO-bound requests (needs gevent and
+                 psycogreen; only the Postgres driver is made cooperative)
+    asgi         uvicorn workers serving asgi:application (see asgi.py)
+
+    $ gunicorn -c ./src/gunicorn_config.py wsgi --chdir ./src/
+    $ GUNICORN_PROFILE=asgi gunicorn -c ./src/gunicorn_config.py asgi:application --chdir ./src/
+
+WEB_CONCURRENCY, WEB_THREADS, GUNICORN_TIMEOUT, GUNICORN_MAX_REQUESTS and
+GUNICORN_MAX_REQUESTS_JITTER override the profile defaults. Without
+WEB_CONCURRENCY the worker count is capped at GUNICORN_MAX_WORKERS (8): in a
+container the visible CPUs are the host's, not the plan's.
+
+PROMETHEUS_MULTIPROC_DIR (default /tmp/prometheus_multiproc) is created and
+exported here, before the app is imported, so /metrics adds up every worker.
+"""
+import os
+import glob
+import multiprocessing
+
+profile = os.getenv("GUNICORN_PROFILE", "production")
+# Los workers no necesitan los comandos `flask db`
+os.environ.setdefault("MIGRATE_CLI", "false")
+try:
+    # Las CPUs que este proceso puede usar, no todas las del host
+    cpus = len(os.sched_getaffinity(0))
+except AttributeError:
+    cpus = multiprocessing.cpu_count()
+
+# prometheus_client lee la variable al importarse: tiene que existir antes que la app
+metrics_dir = os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/prometheus_multiproc")
+os.makedirs(metrics_dir, exist_ok=True)
+
+if profile == "development":
+    workers = 1
+    worker_class = "sync"
+    reload = True
+    preload_app = False
+elif profile == "gevent":
+    # Antes de que preload importe la app (ssl, threading, sockets), como pide gevent
+    from gevent import monkey
+    monkey.patch_all()
+    workers = cpus + 1
+    worker_class = "gevent"
+    worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", 1000))
+    preload_app = True
+elif profile == "asgi":
+    workers = cpus + 1
+    worker_class = "uvicorn.workers.UvicornWorker"
+    preload_app = True
+else:
+    workers = cpus * 2 + 1
+    worker_class = "gthread"
+    threads = int(os.getenv("WEB_THREADS", 4))
+    preload_app = True
+
+workers = int(os.getenv("WEB_CONCURRENCY", min(workers, int(os.getenv("GUNICORN_MAX_WORKERS", 8)))))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+# Reciclar workers de a poco evita fugas de memoria sin reiniciarlos todos a la vez
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 0 if profile == "development" else 1000))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", max_requests // 10))
+
+if os.getenv("PORT"):
+    bind = f"0.0.0.0:{os.environ['PORT']}"
+
+
+def warm_up():
+    from app import app, sitemap
+    from models import db, People, Planets
+    from cache import warm_entity_cache
+
+    warm_entity_cache(app, People, Planets, limit=int(os.getenv("CACHE_WARM_ENTRIES", 500)))
+    with app.test_request_context("/"):
+        sitemap()
+    with app.app_context():
+        db.engine.dispose()
+
+
+def on_starting(server):
+    # Muestras de una ejecucion anterior contarian como si fueran de esta
+    for path in glob.glob(os.path.join(metrics_dir, "*.db")):
+        os.remove(path)
+
+
+def when_ready(server):
+    # Con preload la app ya esta importada en el master; los workers heredan la cache caliente
+    if preload_app:
+        warm_up()
+
+
+def post_fork(server, worker):
+    from app import app
+    from models import db
+
+    with app.app_context():
+        if profile == "gevent" and db.engine.dialect.driver == "psycopg2":
+            # psycopg2 es una extension en C que gevent no parchea: sin esto cada consulta bloquea el bucle
+            from psycogreen.gevent import patch_psycopg
+            patch_psycopg()
+        db.engine.dispose(close=False)
+
+
+def post_worker_init(worker):
+    from app import app
+    from models import People, Planets
+    from cache import keep_entity_cache_warm
+
+    if not preload_app:
+        warm_up()
+    # Las entradas calientes caducan a los CACHE_TTL segundos; se recargan antes
+    keep_entity_cache_warm(app, People, Planets, limit=int(os.getenv("CACHE_WARM_ENTRIES", 500)))
+
+
+def child_exit(server, worker):
+    from metrics import mark_worker_dead
+
+    mark_worker_dead(worker.pid)
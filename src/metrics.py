@@ -0,0 +1,106 @@
+"""
+Prometheus metrics for every route on the app, served at /metrics.
+
+Needs the optional `prometheus_client` package. When running several gunicorn
+workers, point PROMETHEUS_MULTIPROC_DIR to an empty directory before the
+workers start so every process writes its samples there and /metrics
+aggregates all of them.
+"""
+import os
+import time
+from flask import g, request, Response, has_request_context
+from sqlalchemy import event
+
+try:
+    import prometheus_client
+    from prometheus_client import Counter, Histogram, Gauge, CollectorRegistry, generate_latest, multiprocess
+except ImportError:
+    prometheus_client = None
+
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+METRICS_ENABLED = prometheus_client is not None and os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+if prometheus_client is not None:
+    REQUESTS = Counter(
+        "http_requests_total", "HTTP requests", ["method", "route", "status"]
+    )
+    LATENCY = Histogram(
+        "http_request_duration_seconds", "HTTP request latency", ["method", "route"]
+    )
+    DB_TIME = Histogram(
+        "http_request_db_seconds", "Time spent in SQL per request", ["method", "route"],
+        buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+    )
+    IN_FLIGHT = Gauge(
+        "http_requests_in_flight", "Requests being served", multiprocess_mode="livesum"
+    )
+
+
+def route_label():
+    return request.url_rule.rule if request.url_rule is not None else "unmatched"
+
+
+def init_metrics(app, *engines):
+    if not METRICS_ENABLED:
+        return
+
+    def start_db_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_start", []).append(time.perf_counter())
+
+    def stop_db_timer(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["metrics_start"].pop()
+        if has_request_context():
+            g.metrics_db_time = g.get("metrics_db_time", 0.0) + elapsed
+
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", start_db_timer)
+        event.listen(engine, "after_cursor_execute", stop_db_timer)
+
+    @app.before_request
+    def start_metrics():
+        g.metrics_start = time.perf_counter()
+        IN_FLIGHT.inc()
+
+    @app.after_request
+    def record_metrics(response):
+        route = route_label()
+        LATENCY.labels(request.method, route).observe(time.perf_counter() - g.metrics_start)
+        DB_TIME.labels(request.method, route).observe(g.get("metrics_db_time", 0.0))
+        REQUESTS.labels(request.method, route, str(response.status_code)).inc()
+        return response
+
+    @app.teardown_request
+    def finish_metrics(exc):
+        if g.pop("metrics_start", None) is not None:
+            IN_FLIGHT.dec()
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        if MULTIPROC_DIR:
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = prometheus_client.REGISTRY
+        return Response(generate_latest(registry), mimetype=prometheus_client.CONTENT_TYPE_LATEST)
+
+
+def request_started():
+    """For requests served outside Flask (asgi.py); pair with request_finished."""
+    if METRICS_ENABLED:
+        IN_FLIGHT.inc()
+
+
+def request_finished(method, route, status, seconds, db_seconds):
+    """Records a request served outside Flask in the same series as the Flask routes."""
+    if not METRICS_ENABLED:
+        return
+    IN_FLIGHT.dec()
+    LATENCY.labels(method, route).observe(seconds)
+    DB_TIME.labels(method, route).observe(db_seconds)
+    REQUESTS.labels(method, route, str(status)).inc()
+
+
+def mark_worker_dead(pid):
+    """Call from gunicorn's child_exit hook so dead workers stop counting as in flight."""
+    if prometheus_client is not None and MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid)
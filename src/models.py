@@ -1,20 +1,31 @@
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.orm import mapped_column, Mapped, relationship
-from sqlalchemy import Integer, String, ForeignKey
+from sqlalchemy import Integer, String, ForeignKey, DateTime, UniqueConstraint
+from datetime import datetime
 from typing import List
+from werkzeug.security import generate_password_hash, check_password_hash
+from replicas import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 
 class User(db.Model):
     __tablename__ = 'user'
+    # Columnas que expone serialize(), usadas por las lecturas proyectadas
+    public_fields = ("id", "name", "last_name", "email")
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(50), nullable=False)
     last_name: Mapped[str] = mapped_column(String(50), nullable=False)
     email: Mapped[str] = mapped_column(nullable=False, unique=True)
-    password: Mapped[str] = mapped_column(String(8), nullable=False)
+    # Hash de werkzeug, nunca la contrasena en claro
+    password: Mapped[str] = mapped_column(String(255), nullable=False)
     favorite_people: Mapped[List["Favorites_people"]] = relationship()
     favorite_planets: Mapped[List["Favorites_planets"]] = relationship()
    
+    def set_password(self, password):
+        self.password = generate_password_hash(password)
+
+    def check_password(self, password):
+        return check_password_hash(self.password, password)
 
     def serialize(self):
         return {
@@ -27,12 +38,18 @@ class User(db.Model):
     
 class People(db.Model):
     __tablename__ = 'people'
+    public_fields = ("id", "name", "height", "mass", "birth_year", "homeworld")
+    # Solo columnas indexadas
+    filterable_fields = ("name", "homeworld", "height", "mass")
+    sortable_fields = ("id", "name", "homeworld", "height", "mass")
     id: Mapped[int] = mapped_column(primary_key=True)
-    name: Mapped[str] = mapped_column(String(50), nullable=False)
-    height: Mapped[int] = mapped_column(Integer, nullable=True)
-    mass: Mapped[int] = mapped_column(Integer, nullable=True)
+    name: Mapped[str] = mapped_column(String(50), nullable=False, index=True)
+    height: Mapped[int] = mapped_column(Integer, nullable=True, index=True)
+    mass: Mapped[int] = mapped_column(Integer, nullable=True, index=True)
     birth_year: Mapped[int] = mapped_column(Integer, nullable=True)
-    homeworld: Mapped[str] = mapped_column(String(50), nullable=True)
+    homeworld: Mapped[str] = mapped_column(String(50), nullable=True, index=True)
+    # Contador desnormalizado de Favorites_people, lo mantiene stats.track_favorite_counts
+    favorites_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0", index=True)
     # favorites: Mapped[List["Favorites_people"]] = relationship()
     favorites: Mapped[List["Favorites_people"]] = relationship(
         "Favorites_people",
@@ -56,12 +73,16 @@ class People(db.Model):
 
 class Planets(db.Model):
     __tablename__ = 'planets'
+    public_fields = ("id", "name", "climate", "population", "diameter", "orbital_period")
+    filterable_fields = ("name", "climate", "population", "diameter")
+    sortable_fields = ("id", "name", "climate", "population", "diameter")
     id: Mapped[int] = mapped_column(primary_key=True)
-    name: Mapped[str] = mapped_column(nullable=False)
-    climate: Mapped[str] = mapped_column(String(50), nullable=True)
-    population: Mapped[int] = mapped_column(Integer, nullable=True)
-    diameter: Mapped[int] = mapped_column(Integer, nullable=True)
+    name: Mapped[str] = mapped_column(nullable=False, index=True)
+    climate: Mapped[str] = mapped_column(String(50), nullable=True, index=True)
+    population: Mapped[int] = mapped_column(Integer, nullable=True, index=True)
+    diameter: Mapped[int] = mapped_column(Integer, nullable=True, index=True)
     orbital_period: Mapped[int] = mapped_column(Integer, nullable=True)
+    favorites_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0", index=True)
     favorites: Mapped[List["Favorites_planets"]] = relationship(
         "Favorites_planets",
         back_populates="planet",
@@ -83,9 +104,11 @@ class Planets(db.Model):
 
 class Favorites_people(db.Model):
     __tablename__ = 'favorites_people'
+    # El unique (user_id, people_id) tambien sirve de indice para buscar por user_id
+    __table_args__ = (UniqueConstraint('user_id', 'people_id', name='uq_favorites_people_user_people'),)
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey('user.id'), nullable=False)
-    people_id: Mapped[int] = mapped_column(ForeignKey('people.id'), nullable=False)
+    people_id: Mapped[int] = mapped_column(ForeignKey('people.id'), nullable=False, index=True)
     people = relationship("People", back_populates="favorites")
 
     def serialize(self):
@@ -98,9 +121,10 @@ class Favorites_people(db.Model):
     
 class Favorites_planets(db.Model):
     __tablename__ = 'favorites_planets'
+    __table_args__ = (UniqueConstraint('user_id', 'planets_id', name='uq_favorites_planets_user_planets'),)
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey('user.id'), nullable=False)
-    planets_id: Mapped[int] = mapped_column(ForeignKey('planets.id'), nullable=False)
+    planets_id: Mapped[int] = mapped_column(ForeignKey('planets.id'), nullable=False, index=True)
     planet = relationship("Planets", back_populates="favorites")
 
 
@@ -110,4 +134,17 @@ class Favorites_planets(db.Model):
             "user_id":self.user_id,
             "planets_id":self.planets_id
            
-        }
\ No newline at end of file
+        }
+
+class TableVersion(db.Model):
+    __tablename__ = 'table_version'
+    table_name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+
+    def serialize(self):
+        return {
+            "table_name": self.table_name,
+            "version": self.version,
+            "updated_at": self.updated_at
+        }
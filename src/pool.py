@@ -0,0 +1,125 @@
+import os
+import time
+import threading
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+# Limites (en segundos) del histograma de espera al pedir una conexion
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+LIFETIME_BUCKETS = (1, 10, 60, 300, 1800, 3600)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        with self._lock:
+            for index, limit in enumerate(self.buckets):
+                if value <= limit:
+                    self.counts[index] += 1
+                    break
+            else:
+                self.counts[-1] += 1
+            self.total += value
+            self.count += 1
+
+    def serialize(self):
+        labels = [str(limit) for limit in self.buckets] + ["+Inf"]
+        return {
+            "buckets": dict(zip(labels, self.counts)),
+            "count": self.count,
+            "sum": round(self.total, 6)
+        }
+
+
+class PoolStats:
+    def __init__(self):
+        self.checkout_wait = Histogram(WAIT_BUCKETS)
+        self.connection_lifetime = Histogram(LIFETIME_BUCKETS)
+        self.checkout_failures = 0
+        self.engine = None
+
+    def serialize(self):
+        pool = self.engine.pool if self.engine is not None else None
+        return {
+            "pool_class": type(pool).__name__ if pool is not None else None,
+            "size": pool.size() if isinstance(pool, QueuePool) else None,
+            "checked_out": pool.checkedout() if isinstance(pool, QueuePool) else None,
+            "overflow": pool.overflow() if isinstance(pool, QueuePool) else None,
+            "checkout_failures": self.checkout_failures,
+            "checkout_wait_seconds": self.checkout_wait.serialize(),
+            "connection_lifetime_seconds": self.connection_lifetime.serialize()
+        }
+
+
+pool_stats = PoolStats()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a free connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except Exception:
+            pool_stats.checkout_failures += 1
+            raise
+        finally:
+            pool_stats.checkout_wait.observe(time.perf_counter() - start)
+
+
+def engine_options(database_uri):
+    """SQLALCHEMY_ENGINE_OPTIONS built from DB_POOL_* environment variables."""
+    options = {
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() == "true",
+    }
+    if database_uri.startswith("sqlite") and ":memory:" in database_uri:
+        return options
+
+    options["poolclass"] = InstrumentedQueuePool
+    for env, key, cast in (
+        ("DB_POOL_SIZE", "pool_size", int),
+        ("DB_MAX_OVERFLOW", "max_overflow", int),
+        ("DB_POOL_TIMEOUT", "pool_timeout", float),
+        ("DB_POOL_RECYCLE", "pool_recycle", int),
+    ):
+        if os.getenv(env):
+            options[key] = cast(os.getenv(env))
+    return options
+
+
+def app_engines(app, db):
+    """db's engines for app: the primary first (the one /internal/pool shows), then the binds."""
+    with app.app_context():
+        return [db.engine] + [db.engines[key] for key in app.config.get("SQLALCHEMY_BINDS") or ()]
+
+
+def instrument_engine(engine):
+    """Hooks pool events on engine and makes it safe to share across a fork."""
+    if pool_stats.engine is None:
+        pool_stats.engine = engine
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        connection_record.info["connected_at"] = time.monotonic()
+        # SQLite no aplica las foreign keys salvo que se pida; las escrituras de favoritos dependen de ellas
+        if engine.dialect.name == "sqlite":
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA foreign_keys=ON")
+            cursor.close()
+
+    @event.listens_for(engine, "close")
+    def on_close(dbapi_connection, connection_record):
+        connected_at = connection_record.info.pop("connected_at", None)
+        if connected_at is not None:
+            pool_stats.connection_lifetime.observe(time.monotonic() - connected_at)
+
+    # Los workers de gunicorn no deben reutilizar los sockets abiertos por el master
+    if hasattr(os, "register_at_fork"):
+        os.register_at_fork(after_in_child=lambda: engine.dispose(close=False))
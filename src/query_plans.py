@@ -0,0 +1,51 @@
+"""
+Query plans of the statements the endpoints actually run (SQLite).
+
+capture_statements() records every statement sent to an engine while it is
+active and full_scans() runs EXPLAIN QUERY PLAN on one of them with its own
+parameters. tests/test_query_plans.py calls every route with the test client
+inside capture_statements(), so a change to a view is checked as it is.
+"""
+import re
+from contextlib import contextmanager
+from sqlalchemy import event
+
+EXPLAINED = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+LIMIT = re.compile(r"\bLIMIT\b", re.IGNORECASE)
+WHERE = re.compile(r"\bWHERE\b", re.IGNORECASE)
+
+
+@contextmanager
+def capture_statements(engine):
+    """Yields a list that fills with the (statement, parameters) run on engine inside the block."""
+    captured = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters[0] if executemany else parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield captured
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def explain(connection, statement, parameters):
+    return [row[-1] for row in connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)]
+
+
+def full_scans(connection, statement, parameters):
+    """Plan rows of statement that read a whole table; [] when it only uses indexes.
+
+    A first page (LIMIT, no WHERE, no temp b-tree to sort) is read in index order and stops
+    at the limit, so it is not a full scan. FTS virtual tables answer MATCH from their own index.
+    """
+    if not statement.lstrip().upper().startswith(EXPLAINED):
+        return []
+    plan = explain(connection, statement, parameters)
+    if LIMIT.search(statement) and not WHERE.search(statement) and not any("TEMP B-TREE" in detail for detail in plan):
+        return []
+    return [
+        detail for detail in plan
+        if detail.startswith("SCAN ") and "VIRTUAL TABLE" not in detail and "CONSTANT ROW" not in detail
+    ]
@@ -0,0 +1,154 @@
+import os
+import math
+import time
+import threading
+import weakref
+from flask import g, request, has_request_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import text, event
+from sqlalchemy.sql.dml import UpdateBase
+
+# DATABASE_REPLICA_URLS: URLs de replicas de lectura separadas por comas; vacio = todo al primario
+REPLICA_URLS = [
+    url.strip().replace("postgres://", "postgresql://")
+    for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()
+]
+REPLICA_STICKY_SECONDS = float(os.getenv("DB_REPLICA_STICKY_SECONDS", 5))
+REPLICA_HEALTH_INTERVAL = float(os.getenv("DB_REPLICA_HEALTH_INTERVAL", 10))
+REPLICA_CONNECT_TIMEOUT = int(os.getenv("DB_REPLICA_CONNECT_TIMEOUT", 2))
+STICKY_COOKIE = "db_primary_until"
+READ_METHODS = ("GET", "HEAD")
+
+
+def replica_binds(engine_options):
+    """SQLALCHEMY_BINDS entries for DATABASE_REPLICA_URLS, keyed replica_0, replica_1, ..."""
+    binds = {}
+    for index, url in enumerate(REPLICA_URLS):
+        options = engine_options(url)
+        if url.startswith("postgresql"):
+            # Una replica colgada falla rapido y pasa a no sana en lugar de retener la peticion
+            options["connect_args"] = {"connect_timeout": REPLICA_CONNECT_TIMEOUT}
+        binds[f"replica_{index}"] = {"url": url, **options}
+    return binds
+
+
+class ReplicaHealth:
+    """Which replicas answer a SELECT 1, rechecked every `interval` seconds.
+
+    The checks run on a daemon thread started by the first pick() of each worker, so a
+    replica that hangs on connect never blocks a request. Until a replica passes its
+    first check, reads go to the primary.
+    """
+
+    def __init__(self, interval=10):
+        self.interval = interval
+        self._status = {}
+        self._next = 0
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def mark_down(self, key):
+        self._status[key] = False
+
+    def _check(self, engine):
+        try:
+            with engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+            return True
+        except Exception:
+            return False
+
+    def _run(self, engines, keys):
+        while True:
+            for key in keys:
+                self._status[key] = self._check(engines[key])
+            time.sleep(self.interval)
+
+    def _start(self, engines, keys):
+        # Un hilo por proceso: los workers de gunicorn no heredan el del master
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, args=(dict(engines), list(keys)), name="replica-health", daemon=True
+                )
+                self._thread.start()
+
+    def pick(self, engines, keys):
+        """Next healthy replica in turn; None sends the reads to the primary."""
+        if self._thread is None or not self._thread.is_alive():
+            self._start(engines, keys)
+        healthy = [key for key in keys if self._status.get(key)]
+        if not healthy:
+            return None
+        with self._lock:
+            self._next += 1
+            return healthy[self._next % len(healthy)]
+
+    def serialize(self):
+        return dict(self._status)
+
+
+replica_health = ReplicaHealth(REPLICA_HEALTH_INTERVAL)
+# Engines que ya avisan de sus errores (el admin comparte los de la API)
+_watched_engines = weakref.WeakSet()
+
+
+class RoutingSession(Session):
+    """Flask-SQLAlchemy session that sends the reads of a request to g.read_bind.
+
+    Flushes and INSERT/UPDATE/DELETE statements always go to the primary, and so does
+    everything outside a request (CLI, group commit thread).
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        key = g.get("read_bind") if has_request_context() else None
+        if bind is None and key is not None and not self._flushing and not isinstance(clause, UpdateBase):
+            return self._db.engines[key]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def sticky_to_primary():
+    try:
+        return float(request.cookies.get(STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def init_replicas(app, db):
+    """Routes GET/HEAD requests (API and admin list views) to a healthy replica.
+
+    After a successful write the client gets a short-lived cookie and its reads stay on
+    the primary for DB_REPLICA_STICKY_SECONDS, so it sees its own writes. Without
+    replicas, or with none healthy, everything runs on the primary as before. Entries
+    the caches fill from a lagging replica are as stale as the replica, up to their TTL.
+    """
+    keys = sorted(app.config.get("SQLALCHEMY_BINDS", {}))
+    if not keys:
+        return
+
+    with app.app_context():
+        engines = db.engines
+        for key in keys:
+            if engines[key] in _watched_engines:
+                continue
+            _watched_engines.add(engines[key])
+
+            # Un error de conexion saca la replica hasta el siguiente chequeo
+            @event.listens_for(engines[key], "handle_error")
+            def replica_failed(context, key=key):
+                if context.is_disconnect or context.connection is None:
+                    replica_health.mark_down(key)
+
+    @app.before_request
+    def route_reads():
+        if request.method in READ_METHODS and not sticky_to_primary():
+            g.read_bind = replica_health.pick(db.engines, keys)
+
+    @app.after_request
+    def stick_to_primary(response):
+        if request.method not in READ_METHODS + ("OPTIONS",) and response.status_code < 400:
+            response.set_cookie(
+                STICKY_COOKIE, str(time.time() + REPLICA_STICKY_SECONDS),
+                max_age=math.ceil(REPLICA_STICKY_SECONDS), httponly=True, samesite="Lax"
+            )
+        return response
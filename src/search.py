@@ -0,0 +1,149 @@
+"""
+Name search across people and planets, one API over two engines:
+
+- SQLite: an FTS5 table with the trigram tokenizer, filled by triggers on
+  people/planets (rowid = id * 2 for people, id * 2 + 1 for planets).
+- Postgres: generated tsvector columns plus pg_trgm indexes on the names.
+
+Both are created by the migrations; install_sqlite_search() builds the SQLite
+one for databases made with db.create_all() (benchmarks, throwaway copies).
+Any other engine falls back to an indexed name prefix range.
+"""
+import re
+from sqlalchemy import text
+from models import db, People, Planets
+from filters import prefix_predicate
+
+KINDS = {"people": People, "planets": Planets}
+# Objetos creados por las migraciones que no estan en models.py
+UNMAPPED_OBJECTS = {
+    "search_index", "search",
+    "ix_people_search", "ix_planets_search", "ix_people_name_trgm", "ix_planets_name_trgm",
+}
+
+SQLITE_SEARCH_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(name, extra, tokenize='trigram')",
+    """CREATE TRIGGER IF NOT EXISTS people_search_insert AFTER INSERT ON people BEGIN
+        INSERT INTO search_index(rowid, name, extra) VALUES (new.id * 2, new.name, coalesce(new.homeworld, ''));
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS people_search_update AFTER UPDATE OF name, homeworld ON people BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 2;
+        INSERT INTO search_index(rowid, name, extra) VALUES (new.id * 2, new.name, coalesce(new.homeworld, ''));
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS people_search_delete AFTER DELETE ON people BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 2;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS planets_search_insert AFTER INSERT ON planets BEGIN
+        INSERT INTO search_index(rowid, name, extra) VALUES (new.id * 2 + 1, new.name, coalesce(new.climate, ''));
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS planets_search_update AFTER UPDATE OF name, climate ON planets BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 2 + 1;
+        INSERT INTO search_index(rowid, name, extra) VALUES (new.id * 2 + 1, new.name, coalesce(new.climate, ''));
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS planets_search_delete AFTER DELETE ON planets BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 2 + 1;
+    END""",
+]
+
+SQLITE_REBUILD = [
+    "DELETE FROM search_index",
+    "INSERT INTO search_index(rowid, name, extra) SELECT id * 2, name, coalesce(homeworld, '') FROM people",
+    "INSERT INTO search_index(rowid, name, extra) SELECT id * 2 + 1, name, coalesce(climate, '') FROM planets",
+]
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    """Keeps alembic autogenerate from dropping the search objects it does not know about."""
+    if reflected and compare_to is None and (name in UNMAPPED_OBJECTS or name.startswith("search_index_")):
+        return False
+    return True
+
+
+def install_sqlite_search(connection):
+    for statement in SQLITE_SEARCH_DDL + SQLITE_REBUILD:
+        connection.exec_driver_sql(statement)
+
+
+def fts_phrase(value):
+    return '"' + value.replace('"', '""') + '"'
+
+
+def sqlite_matches(q, kinds, limit):
+    """[(kind, id, score)] best first; substring matches, or trigram (typo tolerant) ones if there are none."""
+    parities = [0 if kind == "people" else 1 for kind in kinds]
+    trigrams = {q[i:i + 3] for i in range(len(q) - 2)}
+    found = []
+    for expression in (fts_phrase(q), " OR ".join(fts_phrase(trigram) for trigram in sorted(trigrams))):
+        rows = db.session.execute(text(
+            "SELECT rowid, bm25(search_index, 10.0, 1.0) AS rank, "
+            "substr(lower(name), 1, length(:q)) = lower(:q) AS is_prefix "
+            "FROM search_index WHERE search_index MATCH :expression "
+            f"AND rowid % 2 IN ({', '.join(str(parity) for parity in parities)}) "
+            "ORDER BY is_prefix DESC, rank LIMIT :limit"
+        ), {"q": q, "expression": expression, "limit": limit}).all()
+        for rowid, rank, is_prefix in rows:
+            found.append(("people" if rowid % 2 == 0 else "planets", rowid // 2, round(-rank + is_prefix, 4)))
+        if found:
+            break
+    return found
+
+
+def like_prefix(value):
+    """ILIKE pattern matching names that start with value literally (\\ is LIKE's default escape)."""
+    return re.sub(r"([\\%_])", r"\\\1", value) + "%"
+
+
+def postgres_matches(q, kinds, limit):
+    words = [re.sub(r"[^\w]", "", word) for word in q.split()]
+    tsquery = " & ".join(word + ":*" for word in words if word)
+    # Sin palabras (q="!!!") no hay tsquery valida: solo similitud de trigramas
+    rank = "ts_rank(search, to_tsquery('simple', :tsquery))" if tsquery else "0"
+    where = "search @@ to_tsquery('simple', :tsquery) OR name % :q" if tsquery else "name % :q"
+    selects = []
+    for kind in kinds:
+        selects.append(
+            f"SELECT '{kind}' AS kind, id, "
+            f"{rank} + similarity(name, :q) "
+            "+ CASE WHEN name ILIKE :prefix THEN 1 ELSE 0 END AS score "
+            f"FROM {kind} WHERE {where}"
+        )
+    rows = db.session.execute(text(
+        " UNION ALL ".join(selects) + " ORDER BY score DESC LIMIT :limit"
+    ), {"q": q, "tsquery": tsquery, "prefix": like_prefix(q), "limit": limit}).all()
+    return [(kind, id, round(float(score), 4)) for kind, id, score in rows]
+
+
+def prefix_matches(q, kinds, limit):
+    found = []
+    for kind in kinds:
+        model = KINDS[kind]
+        ids = db.session.scalars(
+            db.select(model.id).where(prefix_predicate(model.name, q)).order_by(model.name).limit(limit)
+        ).all()
+        found += [(kind, id, 1.0) for id in ids]
+    return found[:limit]
+
+
+def search(q, kinds, limit):
+    """Ranked matches for q as [{"type", "score", "result"}], best first."""
+    dialect = db.engine.dialect.name
+    if dialect == "sqlite" and len(q) >= 3:
+        matches = sqlite_matches(q, kinds, limit)
+    elif dialect == "postgresql":
+        matches = postgres_matches(q, kinds, limit)
+    else:
+        matches = prefix_matches(q, kinds, limit)
+
+    rows = {}
+    for kind in kinds:
+        ids = [id for match_kind, id, _ in matches if match_kind == kind]
+        if ids:
+            model = KINDS[kind]
+            for row in db.session.execute(
+                db.select(*(getattr(model, field) for field in model.public_fields)).where(model.id.in_(ids))
+            ).mappings():
+                rows[(kind, row["id"])] = dict(row)
+    return [
+        {"type": kind, "score": score, "result": rows[(kind, id)]}
+        for kind, id, score in matches if (kind, id) in rows
+    ]
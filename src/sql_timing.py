@@ -0,0 +1,68 @@
+import os
+import time
+import logging
+from collections import Counter
+from flask import g, request, has_request_context
+from sqlalchemy import event
+
+logger = logging.getLogger("sql_timing")
+
+
+class NPlusOneError(Exception):
+    pass
+
+
+def init_sql_instrumentation(app, *engines):
+    """Counts and times the SQL run by each request (opt-in with SQL_INSTRUMENTATION=true).
+
+    Adds a Server-Timing header, logs statements slower than SQL_SLOW_MS and flags
+    statements repeated SQL_N_PLUS_ONE_THRESHOLD times in one request as a likely N+1;
+    with SQL_STRICT=true the request fails instead, which is what tests should use.
+    """
+    if os.getenv("SQL_INSTRUMENTATION", "false").lower() != "true":
+        return
+
+    slow_seconds = float(os.getenv("SQL_SLOW_MS", 100)) / 1000
+    repeat_threshold = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", 3))
+    strict = os.getenv("SQL_STRICT", "false").lower() == "true"
+
+    def start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    def stop_timer(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        if not has_request_context():
+            return
+        g.sql_count = g.get("sql_count", 0) + 1
+        g.sql_time = g.get("sql_time", 0.0) + elapsed
+        g.setdefault("sql_statements", Counter())[statement] += 1
+        if elapsed >= slow_seconds:
+            logger.warning("Slow query (%.1f ms) in %s: %s", elapsed * 1000, request.endpoint, statement)
+
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", start_timer)
+        event.listen(engine, "after_cursor_execute", stop_timer)
+
+    @app.before_request
+    def start_request_timer():
+        g.request_start = time.perf_counter()
+
+    @app.after_request
+    def add_server_timing(response):
+        count = g.get("sql_count", 0)
+        db_time = g.get("sql_time", 0.0)
+        total = time.perf_counter() - g.get("request_start", time.perf_counter())
+        response.headers.add(
+            "Server-Timing",
+            f'db;dur={db_time * 1000:.2f};desc="{count} queries", app;dur={total * 1000:.2f}'
+        )
+
+        repeated = [
+            (statement, times) for statement, times in g.get("sql_statements", Counter()).items()
+            if times >= repeat_threshold
+        ]
+        for statement, times in repeated:
+            logger.warning("Possible N+1 in %s: statement ran %d times: %s", request.endpoint, times, statement)
+        if repeated and strict:
+            raise NPlusOneError(f"{request.endpoint} ran the same statement {repeated[0][1]} times")
+        return response
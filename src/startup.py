@@ -0,0 +1,38 @@
+import os
+import sys
+import subprocess
+import click
+
+SRC = os.path.dirname(os.path.abspath(__file__))
+
+
+def import_report(module="app"):
+    """Imports `module` in a fresh interpreter with -X importtime.
+
+    Returns (total seconds, [(cumulative s, self s, module name)]) sorted by cumulative time.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SRC, env=os.environ.copy(), capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us) / 1e6, int(self_us) / 1e6, name.strip()))
+    total = next((cumulative for cumulative, _, name in rows if name == module), 0.0)
+    return total, sorted(rows, reverse=True)
+
+
+def register_startup_commands(app):
+    @app.cli.command("import-report")
+    @click.option("--top", default=20, help="How many modules to list")
+    @click.option("--module", default="app", help="Module to import")
+    def import_report_command(top, module):
+        """Per-module import cost of the app, to track cold-start time."""
+        total, rows = import_report(module)
+        click.echo(f"import {module}: {total * 1000:.1f} ms")
+        click.echo(f"{'cumulative ms':>14} {'self ms':>9}  module")
+        for cumulative, own, name in rows[:top]:
+            click.echo(f"{cumulative * 1000:14.1f} {own * 1000:9.1f}  {name}")
@@ -0,0 +1,128 @@
+import click
+from collections import Counter
+from sqlalchemy import event, update, func, inspect
+from sqlalchemy.orm import Session
+from models import db, People, Planets, Favorites_people, Favorites_planets
+
+# Tabla de favoritos -> (modelo contado, columna que lo referencia)
+FAVORITE_TARGETS = {
+    Favorites_people: (People, "people_id"),
+    Favorites_planets: (Planets, "planets_id"),
+}
+
+
+def _apply(connection, deltas):
+    """One UPDATE per (model, delta) group instead of one per favorite."""
+    groups = {}
+    for (model, id), delta in deltas.items():
+        if delta and id is not None:
+            groups.setdefault((model, delta), []).append(id)
+    for (model, delta), ids in groups.items():
+        table = model.__table__
+        connection.execute(
+            update(table).where(table.c.id.in_(ids)).values(favorites_count=table.c.favorites_count + delta)
+        )
+
+
+def count_inserted(session, fav_model, rows):
+    """Adds the favorites inserted in `rows` (a dict or a list of them) to the counters.
+
+    For statements run with execution_options={"count_favorites": False}, which only know
+    after running whether the row went in.
+    """
+    model, column = FAVORITE_TARGETS[fav_model]
+    rows = rows if isinstance(rows, list) else [rows]
+    deltas = Counter((model, row.get(column)) for row in rows if row)
+    if deltas:
+        _apply(session.connection(), deltas)
+
+
+def track_favorite_counts():
+    """Keeps People/Planets.favorites_count in step with the favorites tables.
+
+    The counters are updated inside the transaction that adds or deletes the favorite, including
+    favorites removed by the delete-orphan cascades and the executemany inserts of bulk.py.
+    Bulk UPDATE/DELETE statements on the favorites tables are not counted; run
+    `flask rebuild-favorite-counts` after those.
+    """
+    @event.listens_for(Session, "before_flush")
+    def load_deleted(session, flush_context, instances):
+        # La FK tiene que estar cargada antes de que la fila desaparezca
+        for obj in session.deleted:
+            if type(obj) in FAVORITE_TARGETS:
+                getattr(obj, FAVORITE_TARGETS[type(obj)][1])
+
+    @event.listens_for(Session, "after_flush")
+    def count_flushed(session, flush_context):
+        deltas = Counter()
+        for obj in session.new:
+            if type(obj) in FAVORITE_TARGETS:
+                model, column = FAVORITE_TARGETS[type(obj)]
+                deltas[(model, getattr(obj, column))] += 1
+        for obj in session.deleted:
+            if type(obj) in FAVORITE_TARGETS:
+                model, column = FAVORITE_TARGETS[type(obj)]
+                deltas[(model, getattr(obj, column))] -= 1
+        for obj in session.dirty:
+            if type(obj) in FAVORITE_TARGETS:
+                model, column = FAVORITE_TARGETS[type(obj)]
+                history = inspect(obj).attrs[column].history
+                for id in history.added:
+                    deltas[(model, id)] += 1
+                for id in history.deleted:
+                    deltas[(model, id)] -= 1
+        if deltas:
+            _apply(session.connection(), deltas)
+
+    @event.listens_for(Session, "do_orm_execute")
+    def count_bulk_inserts(orm_execute_state):
+        mapper = orm_execute_state.bind_mapper
+        if not orm_execute_state.is_insert or mapper is None or mapper.class_ not in FAVORITE_TARGETS:
+            return
+        # Las que solo saben despues si insertaron llaman a count_inserted
+        if not orm_execute_state.execution_options.get("count_favorites", True):
+            return
+        count_inserted(orm_execute_state.session, mapper.class_, orm_execute_state.parameters)
+
+
+def top_favorites(model, limit):
+    """The `limit` most favorited rows of model, read from the favorites_count index."""
+    rows = db.session.execute(
+        db.select(model.id, model.name, model.favorites_count.label("favorites"))
+        .where(model.favorites_count > 0)
+        .order_by(model.favorites_count.desc(), model.id.desc())
+        .limit(limit)
+    ).mappings()
+    return [dict(row) for row in rows]
+
+
+def favorite_counts(model, ids):
+    """{id: favorites} for the requested ids; unknown ids are left out."""
+    rows = db.session.execute(db.select(model.id, model.favorites_count).where(model.id.in_(ids))).all()
+    return {id: count for id, count in rows}
+
+
+def rebuild_favorite_counts():
+    """Recomputes every counter from the favorites tables; returns {table: rows fixed}."""
+    fixed = {}
+    for fav_model, (model, column) in FAVORITE_TARGETS.items():
+        actual = (
+            db.select(func.count())
+            .where(getattr(fav_model, column) == model.id)
+            .scalar_subquery()
+        )
+        result = db.session.execute(
+            update(model).where(model.favorites_count != actual).values(favorites_count=actual),
+            execution_options={"synchronize_session": False}
+        )
+        fixed[model.__tablename__] = result.rowcount
+    db.session.commit()
+    return fixed
+
+
+def register_stats_commands(app):
+    @app.cli.command("rebuild-favorite-counts")
+    def rebuild_favorite_counts_command():
+        """Reconciles people/planets favorites_count with the favorites tables."""
+        for table, count in rebuild_favorite_counts().items():
+            click.echo(f"{table}: {count} counters fixed")
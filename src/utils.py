@@ -1,4 +1,26 @@
-from flask import jsonify, url_for
+import os
+import json
+import base64
+import threading
+from flask import jsonify, url_for, request, Response, stream_with_context, current_app
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+from sqlalchemy import and_, or_, false
+from models import db
+
+# Paginacion por cursor (keyset) sobre la primary key
+DEFAULT_PAGE_SIZE = int(os.getenv("API_DEFAULT_PAGE_SIZE", 50))
+MAX_PAGE_SIZE = int(os.getenv("API_MAX_PAGE_SIZE", 500))
+
+# Exportacion en streaming (NDJSON)
+STREAM_BATCH_SIZE = int(os.getenv("API_STREAM_BATCH_SIZE", 1000))
+
+# Lecturas por lote (?ids=1,2,3)
+MAX_BATCH_IDS = int(os.getenv("API_MAX_BATCH_IDS", 100))
 
 class APIException(Exception):
     status_code = 400
@@ -15,13 +37,207 @@ class APIException(Exception):
         rv['message'] = self.message
         return rv
 
+def encode_cursor(values, sort="id"):
+    raw = json.dumps({"k": values, "s": sort}).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(token, sort="id"):
+    """Values of the last row of the previous page; the cursor must come from the same sort."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        cursor = json.loads(base64.urlsafe_b64decode(padded))
+        values, cursor_sort = cursor["k"], cursor["s"]
+    except Exception:
+        raise APIException("Invalid cursor", status_code=400)
+    if cursor_sort != sort or not isinstance(values, list) or not values or not isinstance(values[-1], int):
+        raise APIException("Invalid cursor", status_code=400)
+    if not all(value is None or type(value) in (int, str) for value in values):
+        raise APIException("Invalid cursor", status_code=400)
+    return values
+
+def check_cursor(order, values):
+    """400 unless each cursor value fits the type of its sort column."""
+    if len(values) != len(order):
+        raise APIException("Invalid cursor", status_code=400)
+    for (column, _), value in zip(order, values):
+        if value is None:
+            if not column.nullable:
+                raise APIException("Invalid cursor", status_code=400)
+        elif type(value) is not column.type.python_type:
+            raise APIException("Invalid cursor", status_code=400)
+
+def parse_sort(model, spec=None):
+    """Turns "-population,name" into [(column, descending)], always ending with id.
+
+    Returns (order, canonical spec); only model.sortable_fields are accepted.
+    """
+    order = []
+    for item in (spec or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name = item.lstrip("-")
+        if name not in getattr(model, "sortable_fields", ("id",)):
+            raise APIException(f"Cannot sort by {name}", status_code=400)
+        order.append((getattr(model, name), item.startswith("-")))
+    if not any(column.key == "id" for column, _ in order):
+        order.append((model.id, False))
+    canonical = ",".join(("-" if desc else "") + column.key for column, desc in order)
+    return order, canonical
+
+def get_sort(model):
+    return parse_sort(model, request.args.get("sort"))
+
+def order_by_clauses(order):
+    # NULLS LAST en todos los motores, para que el cursor sea el mismo en SQLite y Postgres
+    clauses = []
+    for column, desc in order:
+        clause = column.desc() if desc else column.asc()
+        clauses.append(clause.nulls_last() if column.nullable else clause)
+    return clauses
+
+def keyset_predicate(order, values):
+    """Rows strictly after `values` in `order` (NULLs sort last)."""
+    alternatives = []
+    for index, (column, desc) in enumerate(order):
+        value = values[index]
+        if value is None:
+            continue
+        ties = [
+            previous.is_(None) if previous_value is None else previous == previous_value
+            for (previous, _), previous_value in zip(order[:index], values[:index])
+        ]
+        beyond = column < value if desc else column > value
+        if column.nullable:
+            beyond = or_(beyond, column.is_(None))
+        alternatives.append(and_(*ties, beyond))
+    return or_(*alternatives) if alternatives else false()
+
+def parse_page_args(args, sort="id"):
+    """Returns (limit, after) when args ask for a page, None otherwise."""
+    if "limit" not in args and "after" not in args:
+        return None
+    try:
+        limit = int(args.get("limit", DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise APIException("limit must be an integer", status_code=400)
+    if limit < 1:
+        raise APIException("limit must be greater than 0", status_code=400)
+    after = args.get("after")
+    return min(limit, MAX_PAGE_SIZE), decode_cursor(after, sort) if after else None
+
+def get_page_args(sort="id"):
+    return parse_page_args(request.args, sort)
+
+def page_stmt(stmt, order, limit, after=None):
+    if after is not None:
+        check_cursor(order, after)
+        stmt = stmt.where(keyset_predicate(order, after))
+    return stmt.order_by(*order_by_clauses(order)).limit(limit + 1)
+
+def next_page(rows, order, limit, sort):
+    """Trims the extra row fetched by page_stmt and returns (rows, next_cursor)."""
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor([rows[-1][column.key] for column, _ in order], sort)
+    return rows, None
+
+def paginate(stmt, order, sort, limit, after=None):
+    """Keyset page of stmt in `order`, returns (rows, next_cursor)."""
+    rows = db.session.execute(page_stmt(stmt, order, limit, after)).mappings().all()
+    return next_page(rows, order, limit, sort)
+
+def projection(model, requested=None, order=()):
+    """The model's public columns, narrowed to `requested` ("a,b").
+
+    id and the sort columns in `order` are always included, the cursor needs them.
+    """
+    fields = model.public_fields
+    if requested:
+        wanted = {field.strip() for field in requested.split(",") if field.strip()}
+        unknown = wanted - set(fields)
+        if unknown:
+            raise APIException(f"Unknown fields: {', '.join(sorted(unknown))}", status_code=400)
+        wanted |= {column.key for column, _ in order}
+        fields = [field for field in fields if field == "id" or field in wanted]
+    return [getattr(model, field) for field in fields]
+
+def select_fields(model, order=()):
+    """SELECT over the model's public columns, narrowed by ?fields=a,b."""
+    return db.select(*projection(model, request.args.get("fields"), order))
+
+def parse_ids(value, name="ids"):
+    """[int] from "1,2,3" in request order, without duplicates; at most MAX_BATCH_IDS."""
+    try:
+        ids = list(dict.fromkeys(int(id) for id in value.split(",") if id.strip()))
+    except ValueError:
+        raise APIException(f"{name} must be a comma separated list of ids", status_code=400)
+    if not ids:
+        raise APIException(f"{name} must not be empty", status_code=400)
+    if len(ids) > MAX_BATCH_IDS:
+        raise APIException(f"At most {MAX_BATCH_IDS} {name} per request", status_code=400)
+    return ids
+
+def get_ids(name="ids"):
+    """The parsed ?ids= list, or None when the parameter is absent."""
+    value = request.args.get(name)
+    return parse_ids(value, name) if value is not None else None
+
+def batch_stmt(model, ids, requested=None):
+    """One SELECT ... WHERE id IN (...) over the public columns."""
+    return db.select(*projection(model, requested)).where(model.id.in_(ids))
+
+def in_request_order(rows, ids):
+    """The batch body: rows ordered like ids, plus the ids that were not found."""
+    by_id = {row["id"]: dict(row) for row in rows}
+    return {
+        "results": [by_id[id] for id in ids if id in by_id],
+        "missing": [id for id in ids if id not in by_id]
+    }
+
+def wants_stream():
+    if request.args.get("stream") in ("1", "true"):
+        return True
+    return request.accept_mimetypes.best == "application/x-ndjson"
+
+def stream_results(stmt):
+    """Streams every row of stmt as one JSON document per line."""
+    def generate():
+        result = db.session.execute(stmt.execution_options(yield_per=STREAM_BATCH_SIZE))
+        dumps = current_app.json.dumps
+        for partition in result.mappings().partitions():
+            yield "".join(dumps(dict(row)) + "\n" for row in partition)
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Encodes with orjson when it is installed, otherwise behaves like the stdlib provider."""
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS),
+            mimetype=self.mimetype
+        )
+
 def has_no_empty_params(rule):
     defaults = rule.defaults if rule.defaults is not None else ()
     arguments = rule.arguments if rule.arguments is not None else ()
     return len(defaults) >= len(arguments)
 
-def generate_sitemap(app):
-    links = ['/admin/']
+def generate_sitemap(app, include_admin=True):
+    """Builds the sitemap HTML once per app and serves the cached copy afterwards."""
+    cached = app.extensions.get("sitemap_html")
+    if cached is not None:
+        return cached
+
+    links = ['/admin/'] if include_admin else []
     for rule in app.url_map.iter_rules():
         # Filter out rules we can't navigate to in a browser
         # and rules that require parameters
@@ -31,7 +247,7 @@ def generate_sitemap(app):
                 links.append(url)
 
     links_html = "".join(["<li><a href='" + y + "'>" + y + "</a></li>" for y in links])
-    return """
+    app.extensions["sitemap_html"] = """
         <div style="text-align: center;">
         <img style="max-height: 80px" src='https://storage.googleapis.com/breathecode/boilerplates/rigo-baby.jpeg' />
         <h1>Rigo welcomes you to your API!!</h1>
@@ -39,3 +255,50 @@ def generate_sitemap(app):
         <p>Start working on your proyect by following the <a href="https://start.4geeksacademy.com/starters/flask" target="_blank">Quick Start</a></p>
         <p>Remember to specify a real endpoint path like: </p>
         <ul style="text-align: left;">"""+links_html+"</ul></div>"
+    return app.extensions["sitemap_html"]
+
+class LazyAdmin:
+    """WSGI middleware that builds the Flask-Admin app on the first /admin request.
+
+    Keeps flask_admin, flask_wtf and wtforms out of the import path of API-only traffic.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.wsgi_app = app.wsgi_app
+        self.admin_app = None
+        self._lock = threading.Lock()
+
+    def build(self):
+        from flask import Flask
+        from admin import setup_admin
+        from pool import app_engines, instrument_engine
+        from replicas import init_replicas
+        from sql_timing import init_sql_instrumentation
+        from metrics import init_metrics
+
+        admin_app = Flask(self.app.import_name)
+        admin_app.config.update(self.app.config)
+        admin_app.json = FastJSONProvider(admin_app)
+        admin_app.url_map.strict_slashes = False
+        db.init_app(admin_app)
+        # Engines propios del admin con los mismos listeners que la API (PRAGMA foreign_keys, timing,
+        # metricas). Es una segunda pool por worker, pero solo abre conexiones cuando se usa /admin
+        engines = app_engines(admin_app, db)
+        for engine in engines:
+            instrument_engine(engine)
+        init_sql_instrumentation(admin_app, *engines)
+        init_metrics(admin_app, *engines)
+        init_replicas(admin_app, db)
+        setup_admin(admin_app)
+        return admin_app
+
+    def __call__(self, environ, start_response):
+        path = environ.get("PATH_INFO", "")
+        if path != "/admin" and not path.startswith("/admin/"):
+            return self.wsgi_app(environ, start_response)
+        if self.admin_app is None:
+            with self._lock:
+                if self.admin_app is None:
+                    self.admin_app = self.build()
+        return self.admin_app.wsgi_app(environ, start_response)
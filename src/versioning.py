@@ -0,0 +1,235 @@
+import hashlib
+from datetime import datetime, timezone
+from functools import wraps
+from flask import request, make_response, g
+from sqlalchemy import event, update, insert, select, inspect
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from models import db, TableVersion
+from compression import negotiate, cached_body
+
+
+# Tablas escritas en la transaccion; se versionan una vez, al commitear
+PENDING_KEY = "table_versions_pending"
+
+# Tabla de favoritos -> (modelo mostrado, columna que lo referencia), ver track_user_favorites
+_favorite_targets = {}
+
+
+def _bump(connection, tables):
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    table = TableVersion.__table__
+    result = connection.execute(
+        update(table)
+        .where(table.c.table_name.in_(tables))
+        .values(version=table.c.version + 1, updated_at=now)
+    )
+    if result.rowcount < len(tables):
+        known = set(connection.execute(
+            select(table.c.table_name).where(table.c.table_name.in_(tables))
+        ).scalars())
+        rows = [{"table_name": name, "version": 1, "updated_at": now} for name in tables - known]
+        dialect = connection.dialect.name
+        if dialect in ("postgresql", "sqlite"):
+            # Dos primeras escrituras a la vez: la segunda suma en lugar de chocar con la primary key
+            stmt = (postgresql.insert if dialect == "postgresql" else sqlite.insert)(table)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c.table_name],
+                set_={"version": table.c.version + 1, "updated_at": now}
+            )
+        else:
+            stmt = insert(table)
+        connection.execute(stmt, rows)
+
+
+def mark_written(session, *tables):
+    """Records that this transaction changed `tables`; their versions go up when it commits.
+
+    For statements run with execution_options={"track_versions": False}, which only know
+    after running whether they changed anything.
+    """
+    session.info.setdefault(PENDING_KEY, set()).update(tables)
+
+
+def user_favorites_key(user_id):
+    """table_version row of one user's favorites list."""
+    return f"user_favorites:{user_id}"
+
+
+def mark_favorites_of(session, model, ids):
+    """Marks as written the favorites lists of every user who has rows `ids` of model as a favorite."""
+    for fav_model, (target, column) in _favorite_targets.items():
+        if target is model and ids:
+            users = session.execute(
+                select(fav_model.user_id).where(getattr(fav_model, column).in_(ids)).distinct()
+            ).scalars()
+            mark_written(session, *(user_favorites_key(user_id) for user_id in users))
+
+
+def track_user_favorites(favorite_targets):
+    """Bumps user_favorites:<id> when that user's favorites, or a row they show, change.
+
+    favorite_targets maps each favorites model to (shown model, foreign key column), like
+    stats.FAVORITE_TARGETS. GET /user/<id>/favorites is versioned on that row alone, so other
+    users' signups and favorites leave its ETag alone. Bulk UPDATE/DELETE statements with a
+    WHERE clause are not tracked; statements run with track_versions=False call
+    mark_written(session, user_favorites_key(id)) or mark_favorites_of() themselves.
+    """
+    _favorite_targets.update(favorite_targets)
+    targets = {model for model, _ in favorite_targets.values()}
+
+    @event.listens_for(Session, "before_flush")
+    def load_owners(session, flush_context, instances):
+        # user_id tiene que estar cargado antes de que la fila desaparezca
+        for obj in session.deleted:
+            if type(obj) in favorite_targets:
+                obj.user_id
+
+    @event.listens_for(Session, "after_flush")
+    def collect_favorites(session, flush_context):
+        users = set()
+        edited = {}
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+            if type(obj) in favorite_targets:
+                users.add(obj.user_id)
+                users.update(inspect(obj).attrs.user_id.history.deleted)
+        for obj in session.dirty:
+            if type(obj) in targets and session.is_modified(obj):
+                edited.setdefault(type(obj), set()).add(obj.id)
+        if users:
+            mark_written(session, *(user_favorites_key(user_id) for user_id in users))
+        for model, ids in edited.items():
+            mark_favorites_of(session, model, ids)
+
+    @event.listens_for(Session, "do_orm_execute")
+    def collect_inserted(orm_execute_state):
+        mapper = orm_execute_state.bind_mapper
+        if not orm_execute_state.is_insert or mapper is None or mapper.class_ not in favorite_targets:
+            return
+        if not orm_execute_state.execution_options.get("track_versions", True):
+            return
+        rows = orm_execute_state.parameters
+        rows = rows if isinstance(rows, list) else [rows]
+        users = {row.get("user_id") for row in rows if row}
+        mark_written(orm_execute_state.session, *(user_favorites_key(user_id) for user_id in users))
+
+
+def track_versions(*models):
+    """Bumps the table_version row of every model written in a transaction.
+
+    The bump runs in before_commit, inside the writing transaction, so a version is only
+    visible once the data is and the version row stays locked only while committing.
+    """
+    tables = {model.__tablename__ for model in models}
+
+    @event.listens_for(Session, "after_flush")
+    def collect_flushed(session, flush_context):
+        touched = {
+            getattr(obj, "__tablename__", None)
+            for obj in list(session.new) + list(session.dirty) + list(session.deleted)
+        }
+        if touched & tables:
+            mark_written(session, *(touched & tables))
+
+    @event.listens_for(Session, "do_orm_execute")
+    def collect_bulk(orm_execute_state):
+        # Sentencias INSERT/UPDATE/DELETE masivas no pasan por el flush
+        if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+            return
+        if not orm_execute_state.execution_options.get("track_versions", True):
+            return
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None and mapper.local_table.name in tables:
+            mark_written(orm_execute_state.session, mapper.local_table.name)
+
+    @event.listens_for(Session, "before_commit")
+    def bump_written(session):
+        # commit() hace su ultimo flush despues de este evento; se adelanta para no perder tablas
+        session.flush()
+        written = session.info.pop(PENDING_KEY, None)
+        if written:
+            _bump(session.connection(), written)
+
+    @event.listens_for(Session, "after_rollback")
+    def drop_written(session):
+        session.info.pop(PENDING_KEY, None)
+
+
+def versions_query(tables):
+    return (
+        db.select(TableVersion.table_name, TableVersion.version, TableVersion.updated_at)
+        .where(TableVersion.table_name.in_(tables))
+    )
+
+
+def table_versions(*tables):
+    rows = db.session.execute(versions_query(tables)).all()
+    return {row.table_name: (row.version, row.updated_at) for row in rows}
+
+
+def table_version(table):
+    """Current version number of `table`; the one the ETag used when called from a @conditional view."""
+    versions = g.get("table_versions") if g else None
+    if versions is None or table not in versions:
+        versions = table_versions(table)
+    return versions.get(table, (0, None))[0]
+
+
+def version_tag(tables, versions, full_path, accept, encoding=None):
+    """(etag, last_modified) for a request on full_path given the table versions.
+
+    encoding is the negotiated Content-Encoding: each compressed variant gets its own ETag.
+    """
+    token = full_path + "|" + accept + "|" + (encoding or "identity") + "|" + "|".join(
+        f"{table}:{versions.get(table, (0, None))[0]}" for table in sorted(tables)
+    )
+    etag = hashlib.sha1(token.encode()).hexdigest()
+    stamps = [stamp for _, stamp in versions.values() if stamp is not None]
+    last_modified = max(stamps).replace(tzinfo=timezone.utc, microsecond=0) if stamps else None
+    return etag, last_modified
+
+
+def conditional(*tables):
+    """Answers GETs with 304 when the versions of `tables` did not change.
+
+    The ETag comes from the table versions, the request URL, its Accept header and the negotiated
+    encoding, so it is checked before the view runs any query or serialization. Table names
+    are formatted with the view arguments: "user_favorites:{user_id}".
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            names = [table.format(**kwargs) for table in tables]
+            encoding = negotiate(request.headers.get("Accept-Encoding"))
+            # La vista cachea sus bodies con estas mismas versiones (table_version)
+            g.table_versions = table_versions(*names)
+            etag, last_modified = version_tag(
+                names, g.table_versions, request.full_path, request.headers.get("Accept", ""), encoding
+            )
+
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains(etag)
+            else:
+                not_modified = (
+                    last_modified is not None
+                    and request.if_modified_since is not None
+                    and last_modified <= request.if_modified_since
+                )
+            cached = cached_body(etag, encoding) if encoding and not not_modified else None
+            if not_modified:
+                response = make_response("", 304)
+            elif cached is not None:
+                # Mismo ETag: el body comprimido de la vez anterior sigue valiendo
+                response = make_response(cached[0])
+                response.mimetype = cached[1]
+                response.headers["Content-Encoding"] = encoding
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,59 @@
+import os
+import re
+import sys
+import secrets
+import tempfile
+
+# Antes de importar la app: la configuracion se lee al importarla
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "tests.db")
+os.environ["SQL_INSTRUMENTATION"] = "true"
+# Un N+1 hace fallar la peticion en lugar de solo avisar (sql_timing.py)
+os.environ["SQL_STRICT"] = "true"
+os.environ["JWT_SECRET_KEY"] = secrets.token_urlsafe(32)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pytest
+from flask_jwt_extended import create_access_token
+from app import app as flask_app
+from models import db
+from auth import user_cache
+from cache import entity_cache
+from compression import compressed_bodies
+
+
+@pytest.fixture
+def app():
+    """The API on an empty SQLite database, with every in-process cache cleared."""
+    with flask_app.app_context():
+        db.drop_all()
+        db.create_all()
+    for cache in (user_cache.backend, entity_cache.backend, compressed_bodies):
+        cache.clear()
+    yield flask_app
+    with flask_app.app_context():
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def auth_headers(app):
+    def headers(user_id):
+        with app.app_context():
+            return {"Authorization": "Bearer " + create_access_token(identity=str(user_id))}
+    return headers
+
+
+def statements(response):
+    """Statements the request ran, from the Server-Timing header SQL_INSTRUMENTATION adds."""
+    match = re.search(r'desc="(\d+) queries"', response.headers.get("Server-Timing", ""))
+    assert match, "SQL_INSTRUMENTATION did not add Server-Timing"
+    return int(match.group(1))
+
+
+@pytest.fixture(name="statements")
+def statements_fixture():
+    return statements
@@ -0,0 +1,55 @@
+"""GET /user/<id>/favorites runs the same statements whatever the number of favorites."""
+import pytest
+from sqlalchemy import insert
+from models import db, User, People, Planets, Favorites_people, Favorites_planets
+
+# Version de la lista (@conditional), el usuario del token y las dos sentencias de la vista
+MAX_STATEMENTS = 4
+FAVORITES = (0, 5, 50)
+
+
+@pytest.fixture
+def users(app):
+    """User id for each count in FAVORITES, holding that many favorite people and planets."""
+    with app.app_context():
+        db.session.execute(insert(People), [{"name": f"person {i}"} for i in range(max(FAVORITES))])
+        db.session.execute(insert(Planets), [{"name": f"planet {i}"} for i in range(max(FAVORITES))])
+        db.session.execute(insert(User), [
+            {"name": f"user {count}", "last_name": "test", "email": f"user{count}@example.com", "password": "x"}
+            for count in FAVORITES
+        ])
+        for user_id, count in enumerate(FAVORITES, start=1):
+            if count:
+                db.session.execute(insert(Favorites_people), [
+                    {"user_id": user_id, "people_id": id} for id in range(1, count + 1)
+                ])
+                db.session.execute(insert(Favorites_planets), [
+                    {"user_id": user_id, "planets_id": id} for id in range(1, count + 1)
+                ])
+        db.session.commit()
+    return dict(zip(FAVORITES, range(1, len(FAVORITES) + 1)))
+
+
+def test_statements_do_not_grow_with_favorites(client, users, auth_headers, statements):
+    counts = {}
+    for favorites, user_id in users.items():
+        response = client.get(f"/user/{user_id}/favorites", headers=auth_headers(user_id))
+        assert response.status_code == 200
+        body = response.get_json()
+        assert len(body["favorite_people"]) == favorites
+        assert len(body["favorite_planets"]) == favorites
+        counts[favorites] = statements(response)
+
+    assert max(counts.values()) <= MAX_STATEMENTS, counts
+    assert len(set(counts.values())) == 1, counts
+
+
+def test_not_modified_skips_the_view(client, users, auth_headers, statements):
+    user_id = users[50]
+    headers = auth_headers(user_id)
+    etag = client.get(f"/user/{user_id}/favorites", headers=headers).headers["ETag"]
+
+    response = client.get(f"/user/{user_id}/favorites", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    # Solo la version de la lista: el usuario ya esta en la cache de auth
+    assert statements(response) == 1
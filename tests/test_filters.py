@@ -0,0 +1,34 @@
+"""?field[prefix]= filters, including prefixes whose last character has no successor."""
+import pytest
+from urllib.parse import quote
+from sqlalchemy import insert
+from models import db, People
+
+NAMES = ["Luke", "Lukf", "Leia", "Lu\U0010FFFF", "Lu\U0010FFFFz", "a\uD7FF", "a\uD7FFb", "a"]
+
+
+@pytest.fixture
+def people(app):
+    with app.app_context():
+        db.session.execute(insert(People), [{"name": name, "homeworld": "Tatooine"} for name in NAMES])
+        db.session.commit()
+
+
+@pytest.mark.parametrize("prefix, expected", [
+    ("Lu", ["Luke", "Lukf", "Lu\U0010FFFF", "Lu\U0010FFFFz"]),
+    ("Luk", ["Luke", "Lukf"]),
+    ("Lu\U0010FFFF", ["Lu\U0010FFFF", "Lu\U0010FFFFz"]),
+    ("\U0010FFFF", []),
+    ("a\uD7FF", ["a\uD7FF", "a\uD7FFb"]),
+])
+def test_prefix(client, people, prefix, expected):
+    response = client.get("/people?name[prefix]=" + quote(prefix))
+    if not expected:
+        assert response.status_code == 404
+        return
+    assert response.status_code == 200
+    assert sorted(row["name"] for row in response.get_json()["results"]) == sorted(expected)
+
+
+def test_empty_prefix(client, people):
+    assert client.get("/people?name[prefix]=").status_code == 400
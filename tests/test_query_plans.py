@@ -0,0 +1,119 @@
+"""No statement run by an endpoint walks a whole table.
+
+Each route is called with the test client while capture_statements() records what
+reaches the database, and every captured statement is explained with its own
+parameters (query_plans.py). A route without requests here fails the test, so new
+endpoints get checked too.
+"""
+import pytest
+from sqlalchemy import insert
+from models import db, User, People, Planets, Favorites_people, Favorites_planets
+from search import install_sqlite_search
+from query_plans import capture_statements, full_scans
+
+ROWS = 300
+
+# endpoint -> [(metodo, url, body)]; /user/1 es el usuario del token
+REQUESTS = {
+    "sitemap": [("GET", "/", None)],
+    "cache_stats": [("GET", "/internal/cache", None)],
+    "pool_status": [("GET", "/internal/pool", None)],
+    "metrics": [("GET", "/metrics", None)],
+    "get_all_users": [("GET", "/users?limit=20", None), ("GET", "/users?limit=20&after={users}", None)],
+    "create_user": [("POST", "/user", {"name": "new", "last_name": "user", "email": "new@example.com", "password": "secret"})],
+    "login": [("POST", "/login", {"email": "user0@example.com", "password": "wrong"})],
+    "get_user_favorite": [("GET", "/user/1/favorites", None)],
+    "add_favorite_people": [("POST", "/favorite/people/50", None), ("POST", "/favorite/people/1", None)],
+    "add_favorite_planet": [("POST", "/favorite/planet/50", None), ("POST", "/favorite/planet/999999", None)],
+    "add_favorites_bulk": [("POST", "/user/1/favorites/bulk", {"people": [1, 60, 999999], "planets": [2, 61]})],
+    "delete_favorites_people": [("DELETE", "/favorites/people/1", None)],
+    "delete_favorites_planet": [("DELETE", "/favorites/planet/1", None)],
+    "get_all_people": [
+        ("GET", "/people?limit=20&after={people}", None),
+        ("GET", "/people?ids=3,1,2", None),
+        ("GET", "/people?homeworld=planet%201&limit=20", None),
+        ("GET", "/people?height[gte]=195&limit=20", None),
+        ("GET", "/people?name[prefix]=person%201&limit=20", None),
+    ],
+    "get_one_person": [("GET", "/people/5", None)],
+    "create_person": [("POST", "/people", {"name": "new person", "height": 1, "mass": 1, "birth_year": 1, "homeworld": "x"})],
+    "create_people_bulk": [("POST", "/people/bulk", [
+        {"name": name, "height": 1, "mass": 1, "birth_year": 1, "homeworld": "x"} for name in ("person 1", "bulk person")
+    ])],
+    "updated_people": [("PUT", "/people/7", {"name": "renamed"})],
+    "delete_people": [("DELETE", "/people/8", None)],
+    "get_all_planets": [
+        ("GET", "/planets?limit=20&after={planets}", None),
+        ("GET", "/planets?ids=3,1,2", None),
+        ("GET", "/planets?climate=arid&limit=20", None),
+        ("GET", "/planets?population[gte]=29000&limit=20", None),
+    ],
+    "get_one_planet": [("GET", "/planet/5", None)],
+    "create_planet": [("POST", "/planet", {"name": "new planet", "climate": "arid", "diameter": 1, "orbital_period": 1, "population": 1})],
+    "create_planets_bulk": [("POST", "/planet/bulk", [
+        {"name": "bulk planet", "climate": "arid", "diameter": 1, "orbital_period": 1, "population": 1}
+    ])],
+    "update_planet": [("PUT", "/planet/7", {"climate": "frozen"})],
+    "delete_planet": [("DELETE", "/planet/8", None)],
+    "favorites_stats": [("GET", "/stats/favorites", None), ("GET", "/stats/favorites?people=1,2&planets=1", None)],
+    "search_catalog": [("GET", "/search?q=person%2012", None), ("GET", "/search?q=prsn", None)],
+}
+# Rango sobre una columna con indice, ordenado por id: SQLite prefiere recorrer la primary key hasta
+# llenar la pagina a usar el indice y ordenar. Es el plan real del endpoint; se revisa si cambia
+KNOWN_SCANS = {"/people?height[gte]=195&limit=20", "/planets?population[gte]=29000&limit=20"}
+# Vistas de flask-admin que recorren tablas grandes (ADMIN_LARGE_TABLES)
+ADMIN_REQUESTS = [("GET", "/admin/people/?page=1", None), ("GET", "/admin/favorites_people/?flt0_0=1", None)]
+
+
+@pytest.fixture
+def seeded(app, client):
+    with app.app_context():
+        db.session.execute(insert(People), [
+            {"name": f"person {i}", "height": 100 + i % 100, "homeworld": f"planet {i % 10}"} for i in range(ROWS)
+        ])
+        db.session.execute(insert(Planets), [
+            {"name": f"planet {i}", "climate": "arid" if i % 2 else "frozen", "population": i * 100} for i in range(ROWS)
+        ])
+        db.session.execute(insert(User), [
+            {"name": f"user {i}", "last_name": "plans", "email": f"user{i}@example.com", "password": "x"} for i in range(ROWS)
+        ])
+        db.session.execute(insert(Favorites_people), [{"user_id": 1 + i % 10, "people_id": 1 + i} for i in range(ROWS)])
+        db.session.execute(insert(Favorites_planets), [{"user_id": 1 + i % 10, "planets_id": 1 + i} for i in range(ROWS)])
+        install_sqlite_search(db.session.connection())
+        db.session.commit()
+    # Cursores de segunda pagina, los que usa un cliente que pagina
+    return {
+        table: client.get(f"{path}?limit=20").get_json()["next"]
+        for table, path in (("users", "/users"), ("people", "/people"), ("planets", "/planets"))
+    }
+
+
+def api_endpoints(app):
+    return {
+        rule.endpoint for rule in app.url_map.iter_rules()
+        if rule.endpoint != "static" and "." not in rule.endpoint
+    }
+
+
+def test_every_endpoint_is_checked(app):
+    assert api_endpoints(app) - set(REQUESTS) == set()
+
+
+@pytest.mark.parametrize("endpoint", sorted(REQUESTS) + ["admin"])
+def test_no_full_table_scans(app, client, seeded, auth_headers, endpoint):
+    headers = auth_headers(1)
+    requests = ADMIN_REQUESTS if endpoint == "admin" else REQUESTS[endpoint]
+    with app.app_context():
+        engine = db.engine
+    scans = {}
+    for method, url, body in requests:
+        with capture_statements(engine) as captured:
+            response = client.open(url.format(**seeded), method=method, json=body, headers=headers)
+        assert response.status_code < 500, (url, response.get_data(as_text=True))
+        if url in KNOWN_SCANS:
+            continue
+        with engine.connect() as connection:
+            for statement, parameters in captured:
+                if plan := full_scans(connection, statement, parameters):
+                    scans[statement] = plan
+    assert scans == {}
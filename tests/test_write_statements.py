@@ -0,0 +1,48 @@
+"""Statements run by each write endpoint, checked against a budget.
+
+Writes count the table_version UPDATE (versioning.py) and the favorites_count one
+(stats.py); writes that change nothing skip both. Editing a person or planet also
+looks up the users who have it as a favorite (user_favorites:<id>).
+"""
+import pytest
+from sqlalchemy import insert
+from models import db, User, People, Planets
+
+# (metodo, url, body, status esperado, maximo de sentencias)
+BUDGET = {
+    "add favorite person": ("POST", "/favorite/people/2", None, 201, 3),
+    "add favorite planet": ("POST", "/favorite/planet/2", None, 201, 3),
+    "duplicate favorite": ("POST", "/favorite/people/1", None, 409, 1),
+    "favorite of missing person": ("POST", "/favorite/people/999999", None, 404, 3),
+    "update person": ("PUT", "/people/2", {"name": "renamed"}, 200, 3),
+    "update planet": ("PUT", "/planet/2", {"climate": "frozen"}, 200, 3),
+    "update missing person": ("PUT", "/people/999999", {"name": "nobody"}, 404, 1),
+}
+
+
+@pytest.fixture
+def headers(app, client, auth_headers):
+    with app.app_context():
+        db.session.execute(insert(People), [{"name": f"person {i}", "homeworld": "planet 0"} for i in range(10)])
+        db.session.execute(insert(Planets), [{"name": f"planet {i}", "climate": "arid"} for i in range(10)])
+        db.session.execute(insert(User), [
+            {"name": "writer", "last_name": "test", "email": "writer@example.com", "password": "x"}
+        ])
+        db.session.commit()
+    headers = auth_headers(1)
+    # Calentamiento: filas de table_version y usuario en cache, sobre ids que no se miden
+    client.post("/favorite/people/10", headers=headers)
+    client.post("/favorite/planet/10", headers=headers)
+    client.put("/people/10", json={"name": "warm"})
+    client.put("/planet/10", json={"climate": "warm"})
+    # El duplicado necesita el favorito ya puesto
+    client.post("/favorite/people/1", headers=headers)
+    return headers
+
+
+@pytest.mark.parametrize("name", BUDGET)
+def test_write_statements(client, headers, statements, name):
+    method, url, body, status, budget = BUDGET[name]
+    response = client.open(url, method=method, json=body, headers=headers)
+    assert response.status_code == status
+    assert statements(response) <= budget